@@ -7,5 +7,6 @@ from .core import APIDiscovery
 from .scanner import EndpointScanner
 from .reporter import Reporter
 from .auth import Authenticator
+from .cache import AuthCache, CachedSession
 
-__all__ = ['APIDiscovery', 'EndpointScanner', 'Reporter', 'Authenticator']
\ No newline at end of file
+__all__ = ['APIDiscovery', 'EndpointScanner', 'Reporter', 'Authenticator', 'CachedSession', 'AuthCache']
\ No newline at end of file
@@ -1,65 +1,154 @@
 """Authentication module for API Hunter."""
 
 import requests
+import functools
 import json
+import logging
+import re
 import time
-from typing import Dict, Optional, Any
-from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.cookiejar import CookieJar
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Union
+from urllib.parse import urlencode, urljoin, urlsplit
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+except ImportError:  # login forms are found with BeautifulSoup instead
+    lxml_etree = lxml_html = None
+
+logger = logging.getLogger(__name__)
+
+# Endpoints used to verify a Spond token
+_SPOND_TEST_ENDPOINTS = (
+    '/client/api/user',
+    '/client/api/sponds',
+    '/api/user',
+    '/api/profile',
+    '/api/v1/user',
+    '/api/sponds'
+)
+
+# API-based login endpoints (common for modern SPAs)
+_SPOND_LOGIN_ENDPOINTS = (
+    '/api/login',
+    '/api/auth/login',
+    '/api/v1/login',
+    '/api/v1/auth/login',
+    '/auth/login',
+    '/login/api'
+)
+
+# Candidate login endpoints for generic login discovery
+_GENERIC_LOGIN_ENDPOINTS = ('/login', '/api/login', '/auth/login', '/signin')
+
+# How a token probe status is reported and whether it proves the token works.
+# Both statuses mean the endpoint exists; 401 means the token might be invalid.
+_TOKEN_PROBE_OUTCOMES = {
+    200: (logging.INFO, "✅ Token authenticated successfully at %s", True),
+    401: (logging.WARNING, "❌ Token may be expired (401 at %s)", False),
+}
+
+# Largest probe body (in bytes) worth reading to keep the connection alive
+_PROBE_DRAIN_LIMIT = 16 * 1024
+
+# (connect, read) timeout for existence/token probes, so a dead host
+# fails fast instead of stalling each probe for the full read timeout
+_PROBE_TIMEOUT = (2, 5)
+
+# Success/failure markers in a form-login response body, matched on raw bytes
+_LOGIN_SUCCESS_RE = re.compile(rb'welcome|dashboard', re.IGNORECASE)
+_LOGIN_FAILURE_RE = re.compile(rb'error|invalid', re.IGNORECASE)
+
+# Content types for pre-encoded login payloads
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+# Seconds an endpoint-existence probe result stays valid within a scan
+_PROBE_CACHE_TTL = 60
+
+# Response keys that indicate a successful generic login
+_SUCCESS_TOKEN_KEYS = frozenset({'token', 'access_token', 'success', 'authenticated'})
+
+def mount_pooled_adapter(session: requests.Session, pool_connections: int = 16, pool_maxsize: int = 32) -> None:
+    """Mount a connection-pooling HTTPAdapter on a session for both schemes."""
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        # Fail fast on connect/read errors; let urllib3 retry flaky gateways once
+        max_retries=Retry(
+            total=1,
+            connect=0,
+            read=0,
+            status=1,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+@functools.lru_cache(maxsize=32)
+def _api_base(base_url: str) -> str:
+    """Return the scheme://netloc origin of a URL."""
+    parsed_url = urlsplit(base_url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
 
 class Authenticator:
     """Handle authentication for various services."""
     
-    def __init__(self, session: requests.Session):
+    def __init__(self, session: requests.Session, parallel_login: bool = False):
         self.session = session
+        # Sending credentials to every candidate endpoint at once is opt-in
+        self.parallel_login = parallel_login
         self.authenticated = False
         self.auth_cookies = {}
         self.auth_headers = {}
+        # (session state, info) from the last get_session_info call
+        self._session_info_cache = None
+        # url -> (exists, checked_at) for HEAD existence probes
+        self._probe_cache: Dict[str, Tuple[bool, float]] = {}
     
     def login_spond_token(self, token: str, base_url: str) -> bool:
         """Login to Spond service using an existing token."""
         try:
             # Set up the authorization header with the Spond token
-            self.auth_headers['Authorization'] = f'Bearer {token}'
-            self.session.headers.update(self.auth_headers)
+            self.auth_headers['Authorization'] = self.session.headers['Authorization'] = f'Bearer {token}'
             
             # Extract just the domain from the URL for API testing
-            from urllib.parse import urlparse
-            parsed_url = urlparse(base_url)
-            api_base = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            
-            print(f"Testing Spond token authentication against: {api_base}")
+            api_base = _api_base(base_url)
             
-            # Test the token by making a simple API call
-            test_endpoints = [
-                '/client/api/user',
-                '/client/api/sponds', 
-                '/api/user',
-                '/api/profile',
-                '/api/v1/user',
-                '/api/sponds'
-            ]
+            logger.info("Testing Spond token authentication against: %s", api_base)
             
-            for endpoint in test_endpoints:
-                try:
-                    test_url = urljoin(api_base, endpoint)
-                    response = self.session.get(test_url, timeout=10)
+            # Test the token by probing all test endpoints concurrently,
+            # stopping at the first 200
+            test_urls = [api_base + endpoint for endpoint in _SPOND_TEST_ENDPOINTS]
+            executor = ThreadPoolExecutor(max_workers=len(test_urls))
+            try:
+                futures = {executor.submit(self._probe, test_url): test_url for test_url in test_urls}
+                
+                for future in as_completed(futures):
+                    test_url = futures[future]
+                    response = future.result()
+                    if response is None:
+                        continue
                     
-                    # If we get a 200 or 401 (unauthorized), the endpoint exists
-                    # 200 means token works, 401 means endpoint exists but token might be invalid
-                    if response.status_code in [200, 401]:
-                        if response.status_code == 200:
-                            print(f"✅ Token authenticated successfully at {test_url}")
-                            self.authenticated = True
-                            return True
-                        elif response.status_code == 401:
-                            # Token might be expired, but we found a valid endpoint
-                            print(f"❌ Token may be expired (401 at {test_url})")
-                            continue
-                    else:
-                        print(f"🔍 Testing {test_url}: {response.status_code}")
-                            
-                except requests.RequestException:
-                    continue
+                    outcome = _TOKEN_PROBE_OUTCOMES.get(response.status_code)
+                    if outcome is None:
+                        logger.debug("🔍 Testing %s: %s", test_url, response.status_code)
+                        continue
+                    
+                    level, message, token_works = outcome
+                    logger.log(level, message, test_url)
+                    if token_works:
+                        self.authenticated = True
+                        return True
+            finally:
+                # Don't wait for slower probes once we have an answer
+                executor.shutdown(wait=False, cancel_futures=True)
             
             # If no test endpoints worked, still set as authenticated
             # since the user provided a token
@@ -67,140 +156,238 @@ class Authenticator:
             return True
             
         except Exception as e:
-            print(f"Spond token authentication error: {e}")
+            logger.error("Spond token authentication error: %s", e)
             return False
     
+    def _probe(self, url: str) -> Optional[requests.Response]:
+        """GET a probe URL for its status code, returning None if the request fails."""
+        try:
+            response = self.session.get(url, timeout=_PROBE_TIMEOUT, stream=True)
+            # Only the status code is needed: small bodies are drained so the
+            # connection returns to the pool, larger ones are never downloaded
+            content_length = response.headers.get('content-length', '')
+            if content_length.isdigit() and int(content_length) <= _PROBE_DRAIN_LIMIT:
+                # Read only to drain the body so the connection can be reused
+                _ = response.content
+            response.close()
+            return response
+        except requests.RequestException:
+            return None
+    
+    def _endpoint_exists(self, url: str) -> bool:
+        """Check whether an endpoint exists using a body-less HEAD request.
+        
+        Results are remembered for a short while so repeated logins against
+        the same target don't probe the same paths again.
+        """
+        cached = self._probe_cache.get(url)
+        if cached and time.monotonic() - cached[1] < _PROBE_CACHE_TTL:
+            return cached[0]
+        
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=_PROBE_TIMEOUT)
+        except requests.RequestException:
+            return False
+        # 401/403/405 still mean something is listening at this path
+        exists = response.status_code < 500 and response.status_code not in (404, 410)
+        self._probe_cache[url] = (exists, time.monotonic())
+        return exists
+    
+    def _candidate_endpoints(self, api_base: str, candidates: Sequence[str]) -> List[str]:
+        """Return the candidate endpoints that answer a HEAD probe, in order.
+        
+        Credentials only go to endpoints that look live. When none does, every
+        candidate is returned, since POST-only routes often answer HEAD with 404.
+        """
+        with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+            exists = list(executor.map(self._endpoint_exists, [api_base + c for c in candidates]))
+        live = [candidate for candidate, found in zip(candidates, exists) if found]
+        return live or list(candidates)
+    
+    def _parse_json(self, response: requests.Response) -> Optional[Dict[str, Any]]:
+        """Decode a JSON object from the raw response body, or return None."""
+        try:
+            result = json.loads(response.content)
+        except ValueError:
+            return None
+        return result if isinstance(result, dict) else None
+    
+    def _find_login_form(self, content: bytes) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """Return (action, CSRF field name, CSRF token) of the page's login form, or None."""
+        if lxml_html is None:
+            return self._find_login_form_bs4(content)
+        try:
+            doc = lxml_html.fromstring(content)
+        except lxml_etree.ParserError:
+            # e.g. a body holding only a comment or an XML declaration
+            return None
+        
+        # Find login form
+        login_forms = (
+            doc.xpath("//form[@id='loginForm']") or
+            doc.xpath("//form[contains(translate(@action, 'LOGIN', 'login'), 'login')]")
+        )
+        if not login_forms:
+            return None
+        
+        # Extract CSRF token if present
+        csrf_inputs = doc.xpath("//input[contains(translate(@name, 'CSRF', 'csrf'), 'csrf')]")
+        if not csrf_inputs:
+            return login_forms[0].get('action', '/login'), None, None
+        return login_forms[0].get('action', '/login'), csrf_inputs[0].get('name'), csrf_inputs[0].get('value')
+    
+    def _find_login_form_bs4(self, content: bytes) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """BeautifulSoup version of _find_login_form, used when lxml is not installed."""
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Find login form
+        login_form = soup.find('form', {'id': 'loginForm'}) or soup.find('form', action=lambda x: x and 'login' in x.lower())
+        if not login_form:
+            return None
+        
+        # Extract CSRF token if present
+        csrf_input = soup.find('input', {'name': lambda x: x and 'csrf' in x.lower()})
+        if not csrf_input:
+            return login_form.get('action', '/login'), None, None
+        return login_form.get('action', '/login'), csrf_input.get('name'), csrf_input.get('value')
+    
     def login_spond(self, username: str, password: str, base_url: str) -> bool:
         """Login to Spond service."""
         try:
+            # All candidate paths are absolute, so join them to the origin directly
+            api_base = _api_base(base_url)
+            
             # Spond login typically involves multiple steps
             # First, get the login page to extract any CSRF tokens
-            login_url = urljoin(base_url, '/login')
+            login_url = api_base + '/login'
             
             # Try to find the actual login endpoint
-            response = self.session.get(login_url)
-            if response.status_code == 200:
+            response = self.session.get(login_url, timeout=_PROBE_TIMEOUT)
+            login_form = None
+            if response.status_code == 200 and response.content.strip():
                 # Look for login form or API endpoint
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(response.text, 'html.parser')
+                login_form = self._find_login_form(response.content)
+            
+            if login_form:
+                action, csrf_field, csrf_token = login_form
+                login_post_url = urljoin(base_url, action)
                 
-                # Find login form
-                login_form = soup.find('form', {'id': 'loginForm'}) or soup.find('form', action=lambda x: x and 'login' in x.lower())
+                # Prepare login data
+                login_data = {
+                    'username': username,
+                    'password': password,
+                    'email': username,  # Some services use email field
+                }
                 
-                if login_form:
-                    action = login_form.get('action', '/login')
-                    login_post_url = urljoin(base_url, action)
-                    
-                    # Extract CSRF token if present
-                    csrf_token = None
-                    csrf_input = soup.find('input', {'name': lambda x: x and 'csrf' in x.lower()})
-                    if csrf_input:
-                        csrf_token = csrf_input.get('value')
-                    
-                    # Prepare login data
-                    login_data = {
-                        'username': username,
-                        'password': password,
-                        'email': username,  # Some services use email field
-                    }
-                    
-                    if csrf_token:
-                        # Find the actual CSRF field name
-                        csrf_field = csrf_input.get('name')
-                        login_data[csrf_field] = csrf_token
-                    
-                    # Attempt login
-                    login_response = self.session.post(login_post_url, data=login_data)
-                    
-                    # Check if login was successful
-                    if login_response.status_code in [200, 302]:
-                        # Look for success indicators
-                        if 'dashboard' in login_response.url.lower() or 'profile' in login_response.url.lower():
-                            self.authenticated = True
-                            return True
-                        
-                        # Check response content for success/failure indicators
-                        response_text = login_response.text.lower()
-                        if 'welcome' in response_text or 'dashboard' in response_text:
-                            self.authenticated = True
-                            return True
-                        elif 'error' in response_text or 'invalid' in response_text:
-                            return False
-            
-            # Try API-based login (common for modern SPAs)
-            api_login_endpoints = [
-                '/api/login',
-                '/api/auth/login',
-                '/api/v1/login',
-                '/api/v1/auth/login',
-                '/auth/login',
-                '/login/api'
-            ]
-            
-            for endpoint in api_login_endpoints:
-                try:
-                    api_url = urljoin(base_url, endpoint)
-                    login_data = {
-                        'username': username,
-                        'password': password,
-                        'email': username
-                    }
-                    
-                    # Try JSON login
-                    headers = {'Content-Type': 'application/json'}
-                    response = self.session.post(api_url, json=login_data, headers=headers)
-                    
-                    if response.status_code == 200:
-                        try:
-                            result = response.json()
-                            if 'token' in result or 'access_token' in result or 'success' in result:
-                                # Store authentication token if present
-                                if 'token' in result:
-                                    self.auth_headers['Authorization'] = f"Bearer {result['token']}"
-                                elif 'access_token' in result:
-                                    self.auth_headers['Authorization'] = f"Bearer {result['access_token']}"
-                                
-                                self.session.headers.update(self.auth_headers)
-                                self.authenticated = True
-                                return True
-                        except json.JSONDecodeError:
-                            pass
+                if csrf_token:
+                    login_data[csrf_field] = csrf_token
+                
+                # Attempt login
+                login_response = self.session.post(login_post_url, data=login_data)
+                
+                # Check if login was successful
+                if login_response.status_code in [200, 302]:
+                    # Look for success indicators
+                    final_url = login_response.url.lower()
+                    if 'dashboard' in final_url or 'profile' in final_url:
+                        self.authenticated = True
+                        return True
                     
-                    # Try form-encoded login
-                    response = self.session.post(api_url, data=login_data)
-                    if response.status_code == 200:
+                    # Check response content for success/failure indicators
+                    if _LOGIN_SUCCESS_RE.search(login_response.content):
                         self.authenticated = True
                         return True
-                        
-                except requests.RequestException:
-                    continue
+                    elif _LOGIN_FAILURE_RE.search(login_response.content):
+                        return False
+            
+            # Try API-based login against the endpoints that answer a probe
+            api_urls = [api_base + endpoint for endpoint in self._candidate_endpoints(api_base, _SPOND_LOGIN_ENDPOINTS)]
+            login_data = {
+                'username': username,
+                'password': password,
+                'email': username
+            }
+            
+            authorization = self._first_api_login(api_urls, login_data)
+            if authorization is not None:
+                # Store authentication token if present
+                if authorization:
+                    self.auth_headers['Authorization'] = self.session.headers['Authorization'] = authorization
+                self.authenticated = True
+                return True
                     
         except Exception as e:
-            print(f"Login error: {e}")
+            logger.error("Login error: %s", e)
             
         return False
     
+    def _attempt_api_login(self, api_url: str, json_body: bytes, form_body: str) -> Optional[str]:
+        """Try a JSON and then a form-encoded login against one API endpoint.
+        
+        Returns the Authorization header value to use ('' when the login
+        succeeded without a token), or None if the login failed.
+        """
+        try:
+            # Try JSON login
+            response = self.session.post(api_url, data=json_body, headers=_JSON_HEADERS)
+            
+            if response.status_code == 200:
+                result = self._parse_json(response)
+                if result and ('token' in result or 'access_token' in result or 'success' in result):
+                    if 'token' in result:
+                        return f"Bearer {result['token']}"
+                    elif 'access_token' in result:
+                        return f"Bearer {result['access_token']}"
+                    return ''
+            
+            # Try form-encoded login
+            response = self.session.post(api_url, data=form_body, headers=_FORM_HEADERS)
+            if response.status_code == 200:
+                return ''
+                
+        except requests.RequestException:
+            pass
+        
+        return None
+    
+    def _first_api_login(self, api_urls: List[str], login_data: Dict[str, str]) -> Optional[str]:
+        """Return the result of the first successful API login attempt.
+        
+        Attempts run one after another unless parallel_login is enabled, in
+        which case every endpoint receives the credentials at once.
+        """
+        # Encode the payloads once rather than once per endpoint
+        json_body = json.dumps(login_data, allow_nan=False).encode('utf-8')
+        form_body = urlencode(login_data)
+        
+        if not self.parallel_login or len(api_urls) < 2:
+            for api_url in api_urls:
+                authorization = self._attempt_api_login(api_url, json_body, form_body)
+                if authorization is not None:
+                    return authorization
+            return None
+        
+        executor = ThreadPoolExecutor(max_workers=len(api_urls))
+        try:
+            futures = [executor.submit(self._attempt_api_login, api_url, json_body, form_body) for api_url in api_urls]
+            for future in as_completed(futures):
+                authorization = future.result()
+                if authorization is not None:
+                    return authorization
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return None
+    
     def login_generic(self, username: str, password: str, base_url: str, 
                      login_endpoint: str = None, additional_data: Dict[str, str] = None) -> bool:
         """Generic login method for various services."""
         try:
-            if not login_endpoint:
+            if login_endpoint:
+                login_endpoints = [login_endpoint]
+            else:
                 # Try to discover login endpoint
-                login_endpoints = ['/login', '/api/login', '/auth/login', '/signin']
-                for endpoint in login_endpoints:
-                    try:
-                        test_url = urljoin(base_url, endpoint)
-                        response = self.session.get(test_url)
-                        if response.status_code == 200:
-                            login_endpoint = endpoint
-                            break
-                    except:
-                        continue
-            
-            if not login_endpoint:
-                return False
-            
-            login_url = urljoin(base_url, login_endpoint)
+                login_endpoints = self._candidate_endpoints(_api_base(base_url), _GENERIC_LOGIN_ENDPOINTS)
             
             # Prepare login data
             login_data = {
@@ -212,35 +399,46 @@ class Authenticator:
             if additional_data:
                 login_data.update(additional_data)
             
+            # Encode the payloads once rather than once per endpoint
+            json_body = json.dumps(login_data, allow_nan=False).encode('utf-8')
+            form_body = urlencode(login_data)
+            
+            for endpoint in login_endpoints:
+                if self._attempt_generic_login(urljoin(base_url, endpoint), json_body, form_body):
+                    self.authenticated = True
+                    return True
+                
+        except Exception as e:
+            logger.error("Generic login error: %s", e)
+            
+        return False
+    
+    def _attempt_generic_login(self, login_url: str, json_body: bytes, form_body: str) -> bool:
+        """Try a JSON and then a form-encoded login against one endpoint."""
+        try:
             # Try JSON login first
-            headers = {'Content-Type': 'application/json'}
-            response = self.session.post(login_url, json=login_data, headers=headers)
+            response = self.session.post(login_url, data=json_body, headers=_JSON_HEADERS)
             
             if response.status_code == 200:
-                try:
-                    result = response.json()
-                    if any(key in result for key in ['token', 'access_token', 'success', 'authenticated']):
-                        self.authenticated = True
-                        return True
-                except:
-                    pass
+                result = self._parse_json(response)
+                if result and not _SUCCESS_TOKEN_KEYS.isdisjoint(result):
+                    return True
             
             # Try form-encoded login
-            response = self.session.post(login_url, data=login_data)
-            if response.status_code in [200, 302]:
-                self.authenticated = True
-                return True
-                
-        except Exception as e:
-            print(f"Generic login error: {e}")
+            response = self.session.post(login_url, data=form_body, headers=_FORM_HEADERS)
+            return response.status_code in [200, 302]
             
-        return False
+        except requests.RequestException:
+            return False
     
-    def login_with_cookies(self, cookies: Dict[str, str]) -> bool:
-        """Login using provided cookies."""
+    def login_with_cookies(self, cookies: Union[Dict[str, str], CookieJar]) -> bool:
+        """Login using provided cookies.
+        
+        A CookieJar keeps each cookie's domain and path; plain name/value
+        pairs are sent to every host the session talks to.
+        """
         try:
-            for name, value in cookies.items():
-                self.session.cookies.set(name, value)
+            self.session.cookies.update(cookies)
             self.authenticated = True
             return True
         except Exception:
@@ -255,15 +453,61 @@ class Authenticator:
         except Exception:
             return False
     
+    def verify_session(self, base_url: str) -> bool:
+        """Check that credentials restored from a cache are still accepted.
+        
+        With an Authorization header the first token-check endpoint answering
+        200 or 401/403 decides; otherwise the target page must load without
+        an auth error or a bounce to a login page.
+        """
+        if 'Authorization' in self.session.headers:
+            api_base = _api_base(base_url)
+            for endpoint in _SPOND_TEST_ENDPOINTS:
+                response = self._probe(api_base + endpoint)
+                if response is not None and response.status_code in (200, 401, 403):
+                    return response.status_code == 200
+        
+        response = self._probe(base_url)
+        return (
+            response is not None and response.status_code < 400 and
+            'login' not in urlsplit(response.url).path.lower()
+        )
+    
+    def clear_credentials(self, header_names: Sequence[str] = ()) -> None:
+        """Drop the session's cookies and the given auth headers before a fresh login."""
+        self.session.cookies.clear()
+        for name in header_names:
+            self.session.headers.pop(name, None)
+            self.auth_headers.pop(name, None)
+        self.authenticated = False
+    
     def is_authenticated(self) -> bool:
         """Check if currently authenticated."""
         return self.authenticated
     
+    def _session_state(self) -> tuple:
+        """Hashable snapshot of everything get_session_info reports."""
+        return (
+            self.authenticated,
+            tuple((cookie.domain, cookie.path, cookie.name, cookie.value) for cookie in self.session.cookies),
+            tuple(self.session.headers.items()),
+            tuple(self.auth_headers.items()),
+        )
+    
     def get_session_info(self) -> Dict[str, Any]:
-        """Get current session information."""
-        return {
-            'authenticated': self.authenticated,
-            'cookies': dict(self.session.cookies),
-            'headers': dict(self.session.headers),
-            'auth_headers': self.auth_headers
-        }
\ No newline at end of file
+        """Get current session information.
+        
+        The snapshot is rebuilt whenever the cookie jar, the session headers
+        or the auth state change, including cookies set by later responses.
+        Callers get their own copy.
+        """
+        state = self._session_state()
+        if self._session_info_cache is None or self._session_info_cache[0] != state:
+            self._session_info_cache = (state, {
+                'authenticated': self.authenticated,
+                'cookies': self.session.cookies.get_dict(),
+                'headers': dict(self.session.headers),
+                'auth_headers': dict(self.auth_headers)
+            })
+        info = self._session_info_cache[1]
+        return {key: dict(value) if isinstance(value, dict) else value for key, value in info.items()}
@@ -0,0 +1,270 @@
+"""On-disk HTTP cache for re-scans of the same target."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.cookiejar import CookieJar
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.cookies import RequestsCookieJar, create_cookie
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Used when no cache_dir is given (the --cache-dir default)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'apihunter')
+
+# Seconds a saved login stays usable
+AUTH_CACHE_TTL = 3600
+
+# Cached responses kept on disk; the least recently written are evicted first
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+
+# Response headers never written to disk, since they can carry session credentials
+_UNCACHED_HEADERS = frozenset({
+    'set-cookie', 'set-cookie2', 'authorization', 'proxy-authorization',
+    'www-authenticate', 'proxy-authenticate', 'x-auth-token', 'x-csrf-token'
+})
+
+# Validators added to outgoing GETs; they must not follow a redirect
+_CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+class CachedSession(requests.Session):
+    """requests.Session that revalidates GETs against an ETag/Last-Modified disk cache.
+
+    A cached response is only replayed after the server answers the conditional
+    request with 304 Not Modified, so results never go stale; unchanged
+    resources just skip the body download. Streamed requests, non-GET methods
+    and responses without validators pass straight through. At most
+    max_entries responses are kept, oldest evicted first.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.cache_dir: Optional[Path] = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.max_entries = max_entries
+        self._prune_lock = threading.Lock()
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._entry_count = len(self._entry_files())
+        except OSError as e:
+            # An unwritable cache location must not stop the scan
+            logger.debug("⚠️  Response cache disabled (%s): %s", cache_dir, e)
+            self.cache_dir = None
+
+    def send(self, request, **kwargs):
+        if self.cache_dir is None or request.method != 'GET' or kwargs.get('stream'):
+            return super().send(request, **kwargs)
+
+        key = self._cache_key(request)
+        entry = self._load(key)
+        if entry is not None:
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            replayed = self._replay(response, key, entry)
+            if replayed is not None:
+                return replayed
+            # The body file is gone; ask again without the validators
+            response.close()
+            for name in _CONDITIONAL_HEADERS:
+                request.headers.pop(name, None)
+            response = super().send(request, **kwargs)
+        if response.status_code == 200 and (
+            'ETag' in response.headers or 'Last-Modified' in response.headers
+        ):
+            self._store(key, response)
+        return response
+
+    def rebuild_auth(self, prepared_request, response):
+        """Drop the validators resolve_redirects() copies from the original request.
+
+        They describe the cached copy of the first URL, so a redirect target
+        answering 304 to them would hand the caller a bodyless response.
+        """
+        for name in _CONDITIONAL_HEADERS:
+            prepared_request.headers.pop(name, None)
+        super().rebuild_auth(prepared_request, response)
+
+    @staticmethod
+    def _cache_key(request) -> str:
+        """Key on URL plus credentials so authenticated responses stay separate."""
+        parts = (
+            request.url,
+            request.headers.get('Authorization', ''),
+            request.headers.get('Cookie', '')
+        )
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def _load(self, key: str) -> Optional[dict]:
+        """Read the metadata of a cached response, None if absent or unreadable."""
+        try:
+            with open(self.cache_dir / f'{key}.json', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, response: requests.Response) -> None:
+        """Write the body and metadata, each through an atomic rename."""
+        entry = {
+            'url': response.url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': {
+                name: value for name, value in response.headers.items()
+                if name.lower() not in _UNCACHED_HEADERS
+            }
+        }
+        try:
+            self._write_atomic(f'{key}.body', response.content)
+            self._write_atomic(f'{key}.json', json.dumps(entry).encode('utf-8'))
+        except OSError as e:
+            logger.debug("⚠️  Could not cache %s: %s", response.url, e)
+            return
+
+        with self._prune_lock:
+            self._entry_count += 1
+            if self._entry_count > self.max_entries:
+                self._prune()
+
+    def _entry_files(self) -> list:
+        """Metadata files of the cached responses (the auth/ subdirectory is skipped)."""
+        return [e for e in os.scandir(self.cache_dir) if e.name.endswith('.json') and e.is_file()]
+
+    def _prune(self) -> None:
+        """Evict the oldest entries until the cache is back under max_entries."""
+        try:
+            entries = sorted(self._entry_files(), key=lambda e: e.stat().st_mtime)
+        except OSError:
+            return
+        surplus = len(entries) - self.max_entries
+        for entry in entries[:max(surplus, 0)]:
+            stem = entry.path[:-len('.json')]
+            for path in (entry.path, stem + '.body'):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        self._entry_count = min(len(entries), self.max_entries)
+
+    def _write_atomic(self, name: str, data: bytes) -> None:
+        """Write a cache file so concurrent readers never see a partial one."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.cache_dir / name)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+
+    def _replay(self, response: requests.Response, key: str, entry: dict) -> Optional[requests.Response]:
+        """Turn a 304 into the cached 200 response, None if the body is missing."""
+        try:
+            body = (self.cache_dir / f'{key}.body').read_bytes()
+        except OSError:
+            return None
+
+        logger.debug("💾 Not modified, using cached copy of %s", response.url)
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = body
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+class AuthCache:
+    """Short-lived on-disk store of the credentials a successful login produced.
+
+    Entries live under <cache_dir>/auth, are readable by the owner only and
+    are keyed by a hash of (login type, username, origin, login endpoint);
+    passwords are never written.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: float = AUTH_CACHE_TTL):
+        self.auth_dir = Path(cache_dir or DEFAULT_CACHE_DIR) / 'auth'
+        self.ttl = ttl
+
+    def _path(self, login_type: str, username: str, origin: str, endpoint: Optional[str]) -> Path:
+        parts = (login_type, username, origin, endpoint or '')
+        key = hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+        return self.auth_dir / f'{key}.json'
+
+    def load(self, login_type: str, username: str, origin: str,
+             endpoint: Optional[str] = None) -> Optional[dict]:
+        """Return {'cookies': ..., 'headers': ...} if a fresh entry exists.
+
+        Cookies come back as a RequestsCookieJar with their saved domain and
+        path; any cookie without a domain is pinned to the origin's host so it
+        is never sent to third-party URLs found during the scan.
+        """
+        try:
+            with open(self._path(login_type, username, origin, endpoint), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Entries from older versions stored bare name/value pairs without a domain
+        if time.time() - entry.get('saved_at', 0) > self.ttl or not isinstance(entry.get('cookies'), list):
+            return None
+
+        host = urlsplit(origin).hostname or ''
+        jar = RequestsCookieJar()
+        try:
+            for saved in entry['cookies']:
+                jar.set_cookie(create_cookie(
+                    saved['name'], saved['value'],
+                    domain=saved.get('domain') or host,
+                    path=saved.get('path') or '/',
+                    secure=bool(saved.get('secure')),
+                    expires=saved.get('expires')
+                ))
+        except (KeyError, TypeError):
+            return None
+        entry['cookies'] = jar
+        return entry
+
+    def save(self, login_type: str, username: str, origin: str,
+             cookies: CookieJar, headers: Dict[str, str], endpoint: Optional[str] = None) -> None:
+        """Persist session credentials with 0600 permissions."""
+        saved_cookies = [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'secure': cookie.secure,
+                'expires': cookie.expires
+            }
+            for cookie in cookies
+        ]
+        entry = {'saved_at': time.time(), 'cookies': saved_cookies, 'headers': headers}
+        path = self._path(login_type, username, origin, endpoint)
+        try:
+            self.auth_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+        except OSError as e:
+            logger.debug("⚠️  Could not cache login for %s: %s", origin, e)
+
+    def discard(self, login_type: str, username: str, origin: str,
+                endpoint: Optional[str] = None) -> None:
+        """Remove an entry whose credentials the server no longer accepts."""
+        try:
+            self._path(login_type, username, origin, endpoint).unlink()
+        except OSError:
+            pass
@@ -5,161 +5,342 @@ from urllib.parse import urlparse, urljoin
 from bs4 import BeautifulSoup
 import re
 import json
+import logging
 import time
-from typing import List, Dict, Set, Optional
-from dataclasses import dataclass
-from .auth import Authenticator
+import functools
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Set, Optional, Tuple
+from dataclasses import dataclass, field
+from .auth import Authenticator, mount_pooled_adapter
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml
+    _HTML_PARSER = 'lxml'
+except ImportError:  # fall back to the pure-Python parser
+    _HTML_PARSER = 'html.parser'
+
+# Common API patterns, fused into one alternation
+_API_ENDPOINT_RE = re.compile('|'.join(f'(?:{p})' for p in (
+    r'/api/v?\d*/?.*',
+    r'/rest/.*',
+    r'/graphql/?.*',
+    r'/endpoints?/.*',
+    r'/services?/.*',
+    r'\.json$',
+    r'\.xml$',
+    r'/json/.*',
+    r'/xml/.*'
+)), re.IGNORECASE)
+
+# Substrings that make a URL look API-like
+_API_INDICATOR_RE = re.compile(
+    'api|rest|graphql|endpoint|service|json|xml|data|ajax|fetch', re.IGNORECASE
+)
+
+# fetch/XMLHttpRequest patterns in inline scripts; gaps are bounded so a
+# long minified line can't make a failed match rescan the rest of the line
+_FETCH_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'fetch\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'XMLHttpRequest.{0,256}open\s*\(\s*[\'"`](\w+)[\'"`]\s*,\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'ajax\s*\(\s*{.{0,256}url\s*:\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'\.get\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'\.post\s*\(\s*[\'"`]([^\'"`]+)[\'"`]'
+)]
+
+# Advanced JavaScript patterns for API calls
+_AJAX_PATTERNS = [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in (
+    r'axios\.[get|post|put|delete|patch]+\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'\$\.ajax\s*\(\s*{[^}]*url\s*:\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'api\s*\.\s*\w+\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'endpoint\s*[=:]\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'baseURL\s*[=:]\s*[\'"`]([^\'"`]+)[\'"`]',
+    # Modern fetch and API patterns
+    r'fetch\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'\.(get|post|put|delete|patch)\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'url\s*:\s*[\'"`]([^\'"`]+)[\'"`]',
+    r'[\'"`](/(?:client/)?api/[^\'"`]*)[\'"`]',
+    # Spond-specific patterns
+    r'[\'"`](https?://[^\'"`]*spond[^\'"`]*)[\'"`]',
+    r'/client/api/[a-zA-Z0-9/_.-]*'
+)]
+
+# HTML and JavaScript comments, and URLs found inside them
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+# One-pass JavaScript tokenizer: comments are captured, string literals are
+# matched only so that '//' inside them (e.g. URLs) is not taken as a comment
+_JS_TOKEN_RE = re.compile(
+    r'//(?P<line>[^\n]*)'
+    r'|/\*(?P<block>.*?)(?:\*/|\Z)'
+    r'|\'(?:\\.|[^\'\\\n])*\''
+    r'|"(?:\\.|[^"\\\n])*"'
+    r'|`(?:\\.|[^`\\])*`',
+    re.DOTALL
+)
+_COMMENT_URL_RE = re.compile(r'https?://[^\s<>\"\']+|/[a-zA-Z0-9/_.-]+(?:\?[^\s<>\"\']*)?')
+
+def _iter_js_comments(source: str):
+    """Yield the text of each // and /* */ comment in a JavaScript source."""
+    for token in _JS_TOKEN_RE.finditer(source):
+        kind = token.lastgroup
+        if kind is not None:
+            yield token.group(kind)
+
+# Every authenticated-content pattern contains one of these literals, so a
+# page without any of them can skip the whole sweep
+_AUTH_PREFILTER_RE = re.compile(r'api[/.]|/(?:user|profile|dashboard|admin)/', re.IGNORECASE)
+
+# Authenticated-specific patterns; matches stop at quotes and whitespace and
+# are length-bounded, so each one stays inside a single URL-like token
+_AUTH_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'api[/.][^"\'\s<>]{0,256}user[^"\'\s<>]{0,256}',
+    r'api[/.][^"\'\s<>]{0,256}profile[^"\'\s<>]{0,256}',
+    r'api[/.][^"\'\s<>]{0,256}dashboard[^"\'\s<>]{0,256}',
+    r'api[/.][^"\'\s<>]{0,256}admin[^"\'\s<>]{0,256}',
+    r'api[/.][^"\'\s<>]{0,256}settings[^"\'\s<>]{0,256}',
+    r'api[/.][^"\'\s<>]{0,256}account[^"\'\s<>]{0,256}',
+    r'/user/[^"\'\s<>]{0,256}',
+    r'/profile/[^"\'\s<>]{0,256}',
+    r'/dashboard/[^"\'\s<>]{0,256}',
+    r'/admin/[^"\'\s<>]{0,256}',
+    # Spond-specific patterns (more comprehensive)
+    r'/client/api/[^\'\"\\s]*',
+    r'/api/[^\'\"\\s]*spond[^\'\"\\s]*',
+    r'/api/[^\'\"\\s]*event[^\'\"\\s]*',
+    r'/api/[^\'\"\\s]*group[^\'\"\\s]*',
+    r'/api/[^\'\"\\s]*member[^\'\"\\s]*',
+    r'/api/[^\'\"\\s]*notification[^\'\"\\s]*',
+    r'/api/[^\'\"\\s]*chat[^\'\"\\s]*',
+    r'/api/[^\'\"\\s]*message[^\'\"\\s]*',
+    r'client/api/[^\'\"\\s]*',
+    r'api/sponds[^\'\"\\s]*',
+    r'api/events[^\'\"\\s]*',
+    r'api/groups[^\'\"\\s]*',
+    r'api/users[^\'\"\\s]*'
+)]
+
+# data-* attributes that might contain authenticated endpoints
+_DATA_URL_ATTR_RE = re.compile(r'data-[a-zA-Z-]*url[a-zA-Z-]*=[\'"]([^\'"]+)[\'"]', re.IGNORECASE)
+
+# Sustained validation requests per second allowed against a single host
+_HOST_RATE = 10.0
+
+# Entries kept per probe/response cache on an APIDiscovery instance
+_RESPONSE_CACHE_SIZE = 1024
+
+class _LRUCache:
+    """Small thread-safe LRU mapping for remembering probe results."""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+    
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+@functools.lru_cache(maxsize=16384)
+def _is_api_endpoint(url: str) -> bool:
+    """Check if a URL matches common API endpoint patterns."""
+    return _API_ENDPOINT_RE.search(url) is not None
+
+@functools.lru_cache(maxsize=16384)
+def _is_potential_endpoint(url: str) -> bool:
+    """Check if a URL could potentially be an API endpoint."""
+    # Basic checks
+    if not url or url.startswith('javascript:') or url.startswith('mailto:'):
+        return False
+        
+    # Check for API-like patterns
+    return _API_INDICATOR_RE.search(url) is not None
+
+# Endpoint sources (APIEndpoint.source)
+SOURCE_HTML_LINK = 'html_link'
+SOURCE_JAVASCRIPT = 'javascript'
+SOURCE_HTML_FORM = 'html_form'
+SOURCE_AJAX_CALL = 'ajax_call'
+SOURCE_META_TAG = 'meta_tag'
+SOURCE_DATA_ATTRIBUTE = 'data_attribute'
+SOURCE_COMMENT = 'comment'
+SOURCE_AUTHENTICATED_CONTENT = 'authenticated_content'
+SOURCE_AUTHENTICATED_DATA_ATTR = 'authenticated_data_attr'
+SOURCE_AUTHENTICATED_ENDPOINT_TEST = 'authenticated_endpoint_test'
+SOURCE_ROBOTS_TXT = 'robots_txt'
+SOURCE_SITEMAP = 'sitemap'
+SOURCE_SWAGGER_DOCS = 'swagger_docs'
+SOURCE_SWAGGER_SPEC = 'swagger_spec'
+SOURCE_PATH_SCAN = 'path_scan'
+
+@dataclass(slots=True)
 class APIEndpoint:
     """Represents a discovered API endpoint."""
     url: str
     method: str = 'GET'
-    parameters: List[str] = None
-    headers: Dict[str, str] = None
+    parameters: List[str] = field(default_factory=list)
+    headers: Dict[str, str] = field(default_factory=dict)
     source: str = 'unknown'
     confidence: float = 0.0
-    
-    def __post_init__(self):
-        if self.parameters is None:
-            self.parameters = []
-        if self.headers is None:
-            self.headers = {}
 
 class APIDiscovery:
     """Main class for discovering API endpoints from web pages."""
     
-    def __init__(self, base_url: str, timeout: int = 30, authenticator: Authenticator = None, verbose: bool = False):
+    def __init__(self, base_url: str, timeout: int = 30, authenticator: Authenticator = None, verbose: bool = False,
+                 max_workers: int = 10, validate_min_confidence: float = 0.6,
+                 session: Optional[requests.Session] = None):
         self.base_url = base_url
         self.timeout = timeout
         self.verbose = verbose
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'APIHunter/1.0 (API Discovery Tool)'
-        })
+        self.max_workers = max_workers
+        # Candidates below this confidence are reported without a HEAD probe
+        self.validate_min_confidence = validate_min_confidence
+        # base_url is fixed per instance, so memoize joins on the relative part
+        self._join = functools.lru_cache(maxsize=8192)(functools.partial(urljoin, base_url))
+        # Per-host token buckets for validation: host -> (tokens, last refill)
+        self._host_buckets: Dict[str, Tuple[float, float]] = {}
+        self._rate_lock = threading.Lock()
+        # Results remembered across discover_endpoints() calls on this instance:
+        # (url, auth state) -> (status, content type) of validation HEADs,
+        # (url, auth state) -> (status, urls) of authenticated GETs, and
+        # body digest -> AJAX URLs extracted from that body
+        self._validation_cache = _LRUCache(_RESPONSE_CACHE_SIZE)
+        self._response_cache = _LRUCache(_RESPONSE_CACHE_SIZE)
+        self._parsed_cache = _LRUCache(_RESPONSE_CACHE_SIZE)
+        # A caller-supplied session (e.g. the one used to log in) is reused as
+        # is, adapters included; only a session created here gets a keep-alive
+        # pool sized for the validation workers
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'APIHunter/1.0 (API Discovery Tool)'
+            })
+            mount_pooled_adapter(session, pool_maxsize=max(32, max_workers))
+        self.session = session
         self.authenticator = authenticator or Authenticator(self.session)
         
-        # Common API patterns
-        self.api_patterns = [
-            r'/api/v?\d*/?.*',
-            r'/rest/.*',
-            r'/graphql/?.*',
-            r'/endpoints?/.*',
-            r'/services?/.*',
-            r'\.json$',
-            r'\.xml$',
-            r'/json/.*',
-            r'/xml/.*'
-        ]
-        
     def discover_endpoints(self) -> List[APIEndpoint]:
         """Main method to discover API endpoints from the target URL."""
-        endpoints = []
+        # (url, method) pairs already emitted; shared by every helper
+        seen = set()
         
         try:
             # Get the main page (use the full URL, not just domain)
-            print(f"🌐 Fetching: {self.base_url}")
+            logger.info("🌐 Fetching: %s", self.base_url)
             response = self.session.get(self.base_url, timeout=self.timeout)
             response.raise_for_status()
             
-            print(f"📄 Response: {response.status_code} ({len(response.text)} chars)")
+            # Decode the body once and share it with every helper
+            html = response.text
+            logger.info("📄 Response: %s (%d chars)", response.status_code, len(html))
             
             # If we have an authenticator, check if we need to look for more dynamic content
+            discoveries = []
             if self.authenticator.is_authenticated():
-                print("🔐 Authenticated session - looking for authenticated content")
+                logger.info("🔐 Authenticated session - looking for authenticated content")
                 # Look for dynamic content that might be loaded after authentication
-                endpoints.extend(self._discover_authenticated_content(response.text))
+                discoveries.append(self._discover_authenticated_content(html, seen))
             
             # Parse HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(html, _HTML_PARSER)
+            scripts = [script.string for script in soup.find_all('script') if script.string]
             
-            # Discovery methods
-            endpoints.extend(self._discover_from_links(soup))
-            endpoints.extend(self._discover_from_scripts(soup))
-            endpoints.extend(self._discover_from_forms(soup))
-            endpoints.extend(self._discover_from_ajax_calls(response.text))
-            endpoints.extend(self._discover_from_meta_tags(soup))
-            endpoints.extend(self._discover_from_comments(response.text))
+            # Discovery methods, streamed through the shared dedup set in order
+            discoveries.extend((
+                self._discover_from_links(soup, seen),
+                self._discover_from_scripts(scripts, seen),
+                self._discover_from_forms(soup, seen),
+                self._discover_from_ajax_calls(html, seen),
+                self._discover_from_meta_tags(soup, seen),
+                self._discover_from_comments(html, scripts, seen),
+            ))
+            endpoints = list(itertools.chain.from_iterable(discoveries))
             
             # Test common authenticated endpoints if we have authentication
             if self.authenticator and self.authenticator.authenticated:
-                endpoints.extend(self._test_authenticated_endpoints(self.base_url))
-            
-            # Remove duplicates
-            unique_endpoints = self._deduplicate_endpoints(endpoints)
+                endpoints.extend(self._test_authenticated_endpoints(self.base_url, seen))
             
-            # Validate endpoints
-            validated_endpoints = self._validate_endpoints(unique_endpoints)
+            # Validate likely endpoints; low-confidence guesses (comments, meta
+            # tags) are reported unvalidated. Validation updates in place, so
+            # the discovery order is kept.
+            self._validate_endpoints([
+                endpoint for endpoint in endpoints
+                if endpoint.confidence >= self.validate_min_confidence
+            ])
             
-            return validated_endpoints
+            return endpoints
             
         except requests.RequestException as e:
-            print(f"Error fetching {self.base_url}: {e}")
+            logger.error("Error fetching %s: %s", self.base_url, e)
             return []
     
-    def _discover_from_links(self, soup: BeautifulSoup) -> List[APIEndpoint]:
+    def _discover_from_links(self, soup: BeautifulSoup, seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
         """Discover endpoints from HTML links."""
-        endpoints = []
-        
-        for link in soup.find_all('a', href=True):
+        # iselect streams matches instead of building a ResultSet of every link
+        for link in soup.css.iselect('a[href]'):
             href = link['href']
-            full_url = urljoin(self.base_url, href)
+            full_url = self._join(href)
             
-            if self._is_api_endpoint(full_url):
+            if self._is_api_endpoint(full_url) and self._claim(seen, full_url):
                 endpoint = APIEndpoint(
                     url=full_url,
-                    source='html_link',
+                    source=SOURCE_HTML_LINK,
                     confidence=0.7
                 )
-                endpoints.append(endpoint)
-                
-        return endpoints
+                yield endpoint
     
-    def _discover_from_scripts(self, soup: BeautifulSoup) -> List[APIEndpoint]:
-        """Discover endpoints from JavaScript code."""
-        endpoints = []
+    def _discover_from_scripts(self, scripts: List[str], seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
+        """Discover endpoints from inline JavaScript.
         
-        for script in soup.find_all('script'):
-            if script.string:
-                # Look for fetch/XMLHttpRequest patterns
-                fetch_patterns = [
-                    r'fetch\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
-                    r'XMLHttpRequest.*open\s*\(\s*[\'"`](\w+)[\'"`]\s*,\s*[\'"`]([^\'"`]+)[\'"`]',
-                    r'ajax\s*\(\s*{.*url\s*:\s*[\'"`]([^\'"`]+)[\'"`]',
-                    r'\.get\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
-                    r'\.post\s*\(\s*[\'"`]([^\'"`]+)[\'"`]'
-                ]
-                
-                for pattern in fetch_patterns:
-                    matches = re.findall(pattern, script.string, re.IGNORECASE)
-                    for match in matches:
-                        if isinstance(match, tuple):
-                            method, url = match[0], match[1] if len(match) > 1 else match[0]
-                        else:
-                            method, url = 'GET', match
-                            
-                        full_url = urljoin(self.base_url, url)
-                        if self._is_potential_endpoint(full_url):
-                            endpoint = APIEndpoint(
-                                url=full_url,
-                                method=method.upper() if method else 'GET',
-                                source='javascript',
-                                confidence=0.8
-                            )
-                            endpoints.append(endpoint)
-                            
-        return endpoints
+        Each script body is scanned on its own: the patterns' whitespace and
+        non-quote gaps also match newlines, so in a joined buffer a match could
+        run from the end of one script into the next.
+        """
+        # Look for fetch/XMLHttpRequest patterns
+        for pattern in _FETCH_PATTERNS:
+            for script in scripts:
+                for match in pattern.finditer(script):
+                    groups = match.groups()
+                    if len(groups) > 1:
+                        method, url = groups[0], groups[1]
+                    else:
+                        method, url = 'GET', groups[0]
+                        
+                    full_url = self._join(url)
+                    method = method.upper() if method else 'GET'
+                    if self._is_potential_endpoint(full_url) and self._claim(seen, full_url, method):
+                        endpoint = APIEndpoint(
+                            url=full_url,
+                            method=method,
+                            source=SOURCE_JAVASCRIPT,
+                            confidence=0.8
+                        )
+                        yield endpoint
     
-    def _discover_from_forms(self, soup: BeautifulSoup) -> List[APIEndpoint]:
+    def _discover_from_forms(self, soup: BeautifulSoup, seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
         """Discover endpoints from HTML forms."""
-        endpoints = []
-        
         for form in soup.find_all('form'):
             action = form.get('action', '')
             method = form.get('method', 'GET').upper()
             
             if action:
-                full_url = urljoin(self.base_url, action)
+                full_url = self._join(action)
+                if not self._claim(seen, full_url, method):
+                    continue
                 
                 # Get form parameters
                 parameters = []
@@ -172,240 +353,206 @@ class APIDiscovery:
                     url=full_url,
                     method=method,
                     parameters=parameters,
-                    source='html_form',
+                    source=SOURCE_HTML_FORM,
                     confidence=0.6
                 )
-                endpoints.append(endpoint)
-                
-        return endpoints
+                yield endpoint
     
-    def _discover_from_ajax_calls(self, html_content: str) -> List[APIEndpoint]:
+    def _discover_from_ajax_calls(self, html_content: str, seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
         """Discover endpoints from AJAX calls in JavaScript."""
-        endpoints = []
-        
-        # Advanced JavaScript patterns for API calls
-        advanced_patterns = [
-            r'axios\.[get|post|put|delete|patch]+\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
-            r'\$\.ajax\s*\(\s*{[^}]*url\s*:\s*[\'"`]([^\'"`]+)[\'"`]',
-            r'api\s*\.\s*\w+\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
-            r'endpoint\s*[=:]\s*[\'"`]([^\'"`]+)[\'"`]',
-            r'baseURL\s*[=:]\s*[\'"`]([^\'"`]+)[\'"`]',
-            # Modern fetch and API patterns
-            r'fetch\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
-            r'\.(get|post|put|delete|patch)\s*\(\s*[\'"`]([^\'"`]+)[\'"`]',
-            r'url\s*:\s*[\'"`]([^\'"`]+)[\'"`]',
-            r'[\'"`](/(?:client/)?api/[^\'"`]*)[\'"`]',
-            # Spond-specific patterns
-            r'[\'"`](https?://[^\'"`]*spond[^\'"`]*)[\'"`]',
-            r'/client/api/[a-zA-Z0-9/_.-]*'
-        ]
+        return self._ajax_endpoints(self._ajax_urls(html_content), seen)
+    
+    def _ajax_urls(self, html_content: str) -> Iterator[str]:
+        """Yield API-like URLs referenced by AJAX calls in the content."""
+        # Matches are kept only if the joined URL looks API-like, which needs an
+        # indicator in either the page text or the base URL
+        if not (_API_INDICATOR_RE.search(html_content) or _API_INDICATOR_RE.search(self.base_url)):
+            return
         
-        for pattern in advanced_patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE | re.MULTILINE)
-            for match in matches:
-                full_url = urljoin(self.base_url, match)
+        for pattern in _AJAX_PATTERNS:
+            for match in pattern.finditer(html_content):
+                # The URL is always the last group (or the whole match)
+                full_url = self._join(match.group(pattern.groups))
                 if self._is_potential_endpoint(full_url):
-                    endpoint = APIEndpoint(
-                        url=full_url,
-                        source='ajax_call',
-                        confidence=0.9
-                    )
-                    endpoints.append(endpoint)
-                    
-        return endpoints
+                    yield full_url
+    
+    def _ajax_endpoints(self, urls, seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
+        """Build endpoints for AJAX URLs that have not been emitted yet."""
+        for full_url in urls:
+            if self._claim(seen, full_url):
+                endpoint = APIEndpoint(
+                    url=full_url,
+                    source=SOURCE_AJAX_CALL,
+                    confidence=0.9
+                )
+                yield endpoint
     
-    def _discover_from_meta_tags(self, soup: BeautifulSoup) -> List[APIEndpoint]:
+    def _discover_from_meta_tags(self, soup: BeautifulSoup, seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
         """Discover endpoints from meta tags and data attributes."""
-        endpoints = []
-        
         # Check meta tags
         for meta in soup.find_all('meta'):
             content = meta.get('content', '')
             if self._is_potential_endpoint(content):
-                full_url = urljoin(self.base_url, content)
+                full_url = self._join(content)
+                if not self._claim(seen, full_url):
+                    continue
                 endpoint = APIEndpoint(
                     url=full_url,
-                    source='meta_tag',
+                    source=SOURCE_META_TAG,
                     confidence=0.5
                 )
-                endpoints.append(endpoint)
+                yield endpoint
         
         # Check data attributes
         for element in soup.find_all(attrs={'data-api-url': True}):
             url = element['data-api-url']
-            full_url = urljoin(self.base_url, url)
+            full_url = self._join(url)
+            if not self._claim(seen, full_url):
+                continue
             endpoint = APIEndpoint(
                 url=full_url,
-                source='data_attribute',
+                source=SOURCE_DATA_ATTRIBUTE,
                 confidence=0.8
             )
-            endpoints.append(endpoint)
-            
-        return endpoints
+            yield endpoint
     
-    def _discover_from_comments(self, html_content: str) -> List[APIEndpoint]:
+    def _discover_from_comments(self, html_content: str, scripts: List[str],
+                                seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
         """Discover endpoints from HTML/JavaScript comments."""
-        endpoints = []
-        
-        # HTML comments
-        comment_pattern = r'<!--.*?-->'
-        comments = re.findall(comment_pattern, html_content, re.DOTALL)
-        
-        # JavaScript comments
-        js_comment_patterns = [
-            r'//.*',
-            r'/\*.*?\*/'
-        ]
-        
-        all_comments = comments[:]
-        for pattern in js_comment_patterns:
-            all_comments.extend(re.findall(pattern, html_content, re.DOTALL))
+        # HTML comments, then comments inside inline scripts
+        html_comments = (match.group() for match in _HTML_COMMENT_RE.finditer(html_content))
+        js_comments = (comment for script in scripts for comment in _iter_js_comments(script))
         
-        for comment in all_comments:
+        for comment in itertools.chain(html_comments, js_comments):
             # Look for URLs in comments
-            url_pattern = r'https?://[^\s<>\"\']+|/[a-zA-Z0-9/_.-]+(?:\?[^\s<>\"\']*)?'
-            urls = re.findall(url_pattern, comment)
-            
-            for url in urls:
-                full_url = urljoin(self.base_url, url)
-                if self._is_potential_endpoint(full_url):
+            for url in _COMMENT_URL_RE.finditer(comment):
+                full_url = self._join(url.group())
+                if self._is_potential_endpoint(full_url) and self._claim(seen, full_url):
                     endpoint = APIEndpoint(
                         url=full_url,
-                        source='comment',
+                        source=SOURCE_COMMENT,
                         confidence=0.4
                     )
-                    endpoints.append(endpoint)
-                    
-        return endpoints
+                    yield endpoint
     
     def _is_api_endpoint(self, url: str) -> bool:
         """Check if a URL matches common API endpoint patterns."""
-        for pattern in self.api_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return True
-        return False
+        return _is_api_endpoint(url)
     
     def _is_potential_endpoint(self, url: str) -> bool:
         """Check if a URL could potentially be an API endpoint."""
-        # Basic checks
-        if not url or url.startswith('javascript:') or url.startswith('mailto:'):
+        return _is_potential_endpoint(url)
+    
+    @staticmethod
+    def _claim(seen: Set[Tuple[str, str]], url: str, method: str = 'GET') -> bool:
+        """Record a (url, method) pair, returning False if it was already emitted."""
+        key = (url, method)
+        if key in seen:
             return False
-            
-        # Check for API-like patterns
-        api_indicators = [
-            'api', 'rest', 'graphql', 'endpoint', 'service',
-            'json', 'xml', 'data', 'ajax', 'fetch'
-        ]
-        
-        url_lower = url.lower()
-        return any(indicator in url_lower for indicator in api_indicators)
+        seen.add(key)
+        return True
     
-    def _deduplicate_endpoints(self, endpoints: List[APIEndpoint]) -> List[APIEndpoint]:
-        """Remove duplicate endpoints."""
-        seen = set()
-        unique_endpoints = []
-        
-        for endpoint in endpoints:
-            key = (endpoint.url, endpoint.method)
-            if key not in seen:
-                seen.add(key)
-                unique_endpoints.append(endpoint)
-                
-        return unique_endpoints
+    @staticmethod
+    def _auth_state(session: requests.Session) -> Tuple[Optional[str], frozenset]:
+        """Credentials a cached response depends on, usable as part of a cache key."""
+        return session.headers.get('Authorization'), frozenset(session.cookies.get_dict().items())
     
     def _validate_endpoints(self, endpoints: List[APIEndpoint]) -> List[APIEndpoint]:
-        """Validate endpoints by making HTTP requests."""
-        validated = []
+        """Validate endpoints by making concurrent HTTP requests."""
+        if not endpoints:
+            return []
         
-        for endpoint in endpoints:
+        # Cached statuses are only valid for the credentials they were fetched with
+        validate = functools.partial(self._validate_endpoint, auth_state=self._auth_state(self.session))
+        
+        # map() keeps results in discovery order
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(endpoints))) as executor:
+            return list(executor.map(validate, endpoints))
+    
+    def _validate_endpoint(self, endpoint: APIEndpoint, auth_state: Optional[tuple] = None) -> APIEndpoint:
+        """Adjust an endpoint's confidence based on a HEAD request."""
+        if auth_state is None:
+            auth_state = self._auth_state(self.session)
+        outcome = self._validation_cache.get((endpoint.url, auth_state))
+        if outcome is None:
+            self._wait_for_host(endpoint.url)
             try:
                 # Make a HEAD request to check if endpoint exists
                 response = self.session.head(endpoint.url, timeout=5, allow_redirects=True)
-                
-                # Update confidence based on response
-                if response.status_code < 400:
-                    endpoint.confidence = min(endpoint.confidence + 0.2, 1.0)
-                    
-                    # Check content type for API indicators
-                    content_type = response.headers.get('content-type', '').lower()
-                    if any(ct in content_type for ct in ['json', 'xml', 'api']):
-                        endpoint.confidence = min(endpoint.confidence + 0.1, 1.0)
-                        
-                validated.append(endpoint)
-                
+                outcome = (response.status_code, response.headers.get('content-type', '').lower())
+                self._validation_cache.put((endpoint.url, auth_state), outcome)
             except requests.RequestException:
-                # Keep endpoint but with lower confidence
-                endpoint.confidence = max(endpoint.confidence - 0.3, 0.1)
-                validated.append(endpoint)
-                
-            # Rate limiting
-            time.sleep(0.1)
+                # Transport errors may be transient, so they are never cached
+                outcome = (None, '')
+        
+        status_code, content_type = outcome
+        if status_code is None:
+            # Keep endpoint but with lower confidence
+            endpoint.confidence = max(endpoint.confidence - 0.3, 0.1)
+        elif status_code < 400:
+            # Update confidence based on response
+            endpoint.confidence = min(endpoint.confidence + 0.2, 1.0)
             
-        return validated
+            # Check content type for API indicators
+            if any(ct in content_type for ct in ['json', 'xml', 'api']):
+                endpoint.confidence = min(endpoint.confidence + 0.1, 1.0)
+        
+        return endpoint
     
-    def _discover_authenticated_content(self, html_content: str) -> List[APIEndpoint]:
-        """Discover endpoints that are typically only visible when authenticated."""
-        endpoints = []
+    def _wait_for_host(self, url: str) -> None:
+        """Rate limit requests per host with a token bucket.
+        
+        Each host allows a burst of max_workers requests, then refills at
+        _HOST_RATE per second; requests to different hosts never wait on
+        each other.
+        """
+        host = urlparse(url).netloc
+        with self._rate_lock:
+            now = time.monotonic()
+            tokens, refilled_at = self._host_buckets.get(host, (self.max_workers, now))
+            tokens = min(self.max_workers, tokens + (now - refilled_at) * _HOST_RATE) - 1
+            self._host_buckets[host] = (tokens, now)
         
+        # A negative balance reserves a future token; wait until it is due
+        if tokens < 0:
+            time.sleep(-tokens / _HOST_RATE)
+    
+    def _discover_authenticated_content(self, html_content: str, seen: Set[Tuple[str, str]]) -> Iterator[APIEndpoint]:
+        """Discover endpoints that are typically only visible when authenticated."""
         # Only run if we have authentication
         if not self.authenticator or not self.authenticator.authenticated:
-            return endpoints
+            return
         
-        # Look for authenticated-specific patterns
-        auth_patterns = [
-            r'api[/.].*user.*',
-            r'api[/.].*profile.*',
-            r'api[/.].*dashboard.*',
-            r'api[/.].*admin.*',
-            r'api[/.].*settings.*',
-            r'api[/.].*account.*',
-            r'/user/.*',
-            r'/profile/.*',
-            r'/dashboard/.*',
-            r'/admin/.*',
-            # Spond-specific patterns (more comprehensive)
-            r'/client/api/[^\'\"\\s]*',
-            r'/api/[^\'\"\\s]*spond[^\'\"\\s]*',
-            r'/api/[^\'\"\\s]*event[^\'\"\\s]*',
-            r'/api/[^\'\"\\s]*group[^\'\"\\s]*',
-            r'/api/[^\'\"\\s]*member[^\'\"\\s]*',
-            r'/api/[^\'\"\\s]*notification[^\'\"\\s]*',
-            r'/api/[^\'\"\\s]*chat[^\'\"\\s]*',
-            r'/api/[^\'\"\\s]*message[^\'\"\\s]*',
-            r'client/api/[^\'\"\\s]*',
-            r'api/sponds[^\'\"\\s]*',
-            r'api/events[^\'\"\\s]*',
-            r'api/groups[^\'\"\\s]*',
-            r'api/users[^\'\"\\s]*'
-        ]
+        # Cheap literal scan before running ~20 patterns over the page
+        auth_patterns = _AUTH_PATTERNS if _AUTH_PREFILTER_RE.search(html_content) else ()
         
         for pattern in auth_patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE)
-            for match in matches:
-                full_url = urljoin(self.base_url, match)
+            for match in pattern.finditer(html_content):
+                full_url = self._join(match.group())
+                if not self._claim(seen, full_url):
+                    continue
                 endpoint = APIEndpoint(
                     url=full_url,
-                    source='authenticated_content',
+                    source=SOURCE_AUTHENTICATED_CONTENT,
                     confidence=0.8
                 )
-                endpoints.append(endpoint)
+                yield endpoint
         
         # Look for data-* attributes that might contain authenticated endpoints
-        data_attr_pattern = r'data-[a-zA-Z-]*url[a-zA-Z-]*=[\'"]([^\'"]+)[\'"]'
-        matches = re.findall(data_attr_pattern, html_content, re.IGNORECASE)
-        for match in matches:
-            if self._is_potential_endpoint(match):
-                full_url = urljoin(self.base_url, match)
+        for match in _DATA_URL_ATTR_RE.finditer(html_content):
+            url = match.group(1)
+            if self._is_potential_endpoint(url):
+                full_url = self._join(url)
+                if not self._claim(seen, full_url):
+                    continue
                 endpoint = APIEndpoint(
                     url=full_url,
-                    source='authenticated_data_attr',
+                    source=SOURCE_AUTHENTICATED_DATA_ATTR,
                     confidence=0.7
                 )
-                endpoints.append(endpoint)
-        
-        return endpoints
+                yield endpoint
     
-    def _test_authenticated_endpoints(self, url: str) -> List[APIEndpoint]:
+    def _test_authenticated_endpoints(self, url: str, seen: Set[Tuple[str, str]]) -> List[APIEndpoint]:
         """Test common authenticated endpoints to discover more APIs."""
         endpoints = []
         session = self.authenticator.session
@@ -436,41 +583,66 @@ class APIDiscovery:
             '/api/settings'
         ]
         
-        print("🔍 Testing common authenticated endpoints...")
+        logger.info("🔍 Testing common authenticated endpoints...")
+        
+        # Cached statuses are only valid for the credentials they were fetched with
+        auth_state = self._auth_state(session)
         
-        for path in common_auth_paths:
+        def fetch(auth_url):
+            cached = self._response_cache.get((auth_url, auth_state))
+            if cached is not None:
+                return cached, None
             try:
-                auth_url = urljoin(base_url, path)
-                if self.verbose:
-                    print(f"  Testing: {auth_url}")
-                    
                 response = session.get(auth_url, timeout=self.timeout)
+            except Exception as e:
+                return None, e
+            
+            # Also scan 200 bodies for more API references; identical bodies
+            # (by digest) are only parsed once
+            urls = ()
+            if response.status_code == 200:
+                digest = hashlib.blake2b(response.content, digest_size=16).digest()
+                urls = self._parsed_cache.get(digest)
+                if urls is None:
+                    try:
+                        urls = tuple(self._ajax_urls(response.text))
+                    except Exception:
+                        urls = ()
+                    self._parsed_cache.put(digest, urls)
+            
+            result = (response.status_code, urls)
+            self._response_cache.put((auth_url, auth_state), result)
+            return result, None
+        
+        auth_urls = [urljoin(base_url, path) for path in common_auth_paths]
+        
+        # Requests overlap in the pool; results are reported in path order
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(auth_urls))) as executor:
+            for auth_url, (result, error) in zip(auth_urls, executor.map(fetch, auth_urls)):
+                logger.debug("  Testing: %s", auth_url)
                 
-                if response.status_code == 200:
-                    print(f"  ✅ Found: {auth_url} (200 OK)")
-                    endpoint = APIEndpoint(
-                        url=auth_url,
-                        method='GET',
-                        source='authenticated_endpoint_test',
-                        confidence=0.95
-                    )
-                    endpoints.append(endpoint)
+                if error is not None:
+                    logger.debug("  ⚠️  Error testing %s: %s", auth_url, error)
+                    continue
+                
+                status_code, content_urls = result
+                if status_code == 200:
+                    logger.info("  ✅ Found: %s (200 OK)", auth_url)
+                    if self._claim(seen, auth_url):
+                        endpoint = APIEndpoint(
+                            url=auth_url,
+                            method='GET',
+                            source=SOURCE_AUTHENTICATED_ENDPOINT_TEST,
+                            confidence=0.95
+                        )
+                        endpoints.append(endpoint)
                     
-                    # Also scan the response content for more API references
-                    try:
-                        content_endpoints = self._discover_from_ajax_calls(response.text)
-                        endpoints.extend(content_endpoints)
-                    except:
-                        pass
+                    # API references found in the response content
+                    endpoints.extend(self._ajax_endpoints(content_urls, seen))
                         
-                elif response.status_code in [401, 403]:
-                    if self.verbose:
-                        print(f"  ⚠️  {auth_url} needs different auth ({response.status_code})")
-                elif self.verbose:
-                    print(f"  ❌ {auth_url} returned {response.status_code}")
-                    
-            except Exception as e:
-                if self.verbose:
-                    print(f"  ⚠️  Error testing {auth_url}: {e}")
+                elif status_code in [401, 403]:
+                    logger.debug("  ⚠️  %s needs different auth (%s)", auth_url, status_code)
+                else:
+                    logger.debug("  ❌ %s returned %s", auth_url, status_code)
         
         return endpoints
\ No newline at end of file
@@ -1,85 +1,64 @@
 """Reporting and output functionality."""
 
+import bisect
 import json
 import csv
-from typing import List, Dict
+import io
+import string
+from html import escape
+from dataclasses import fields
+from operator import attrgetter
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime
 from .core import APIEndpoint
 
-class Reporter:
-    """Generate reports from discovered API endpoints."""
-    
-    def __init__(self):
-        self.timestamp = datetime.now().isoformat()
-    
-    def generate_json_report(self, endpoints: List[APIEndpoint], output_file: str = None) -> str:
-        """Generate a JSON report of discovered endpoints."""
-        report_data = {
-            'timestamp': self.timestamp,
-            'total_endpoints': len(endpoints),
-            'endpoints': []
-        }
-        
-        for endpoint in endpoints:
-            endpoint_data = {
-                'url': endpoint.url,
-                'method': endpoint.method,
-                'parameters': endpoint.parameters,
-                'headers': endpoint.headers,
-                'source': endpoint.source,
-                'confidence': endpoint.confidence
-            }
-            report_data['endpoints'].append(endpoint_data)
-        
-        # Sort by confidence (highest first)
-        report_data['endpoints'].sort(key=lambda x: x['confidence'], reverse=True)
-        
-        json_output = json.dumps(report_data, indent=2, ensure_ascii=False)
-        
-        if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(json_output)
-                
-        return json_output
-    
-    def generate_csv_report(self, endpoints: List[APIEndpoint], output_file: str = None) -> str:
-        """Generate a CSV report of discovered endpoints."""
-        import io
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header
-        writer.writerow(['URL', 'Method', 'Parameters', 'Source', 'Confidence', 'Headers'])
-        
-        # Sort by confidence
-        sorted_endpoints = sorted(endpoints, key=lambda x: x.confidence, reverse=True)
-        
-        for endpoint in sorted_endpoints:
-            writer.writerow([
-                endpoint.url,
-                endpoint.method,
-                ', '.join(endpoint.parameters) if endpoint.parameters else '',
-                endpoint.source,
-                f'{endpoint.confidence:.2f}',
-                json.dumps(endpoint.headers) if endpoint.headers else ''
-            ])
-        
-        csv_content = output.getvalue()
-        output.close()
-        
-        if output_file:
-            with open(output_file, 'w', newline='', encoding='utf-8') as f:
-                f.write(csv_content)
-                
-        return csv_content
+try:
+    import orjson
+except ImportError:  # stdlib json produces the same indented output
+    orjson = None
+
+_BY_CONFIDENCE = attrgetter('confidence')
+
+# JSON report keys, in dataclass field order (url, method, ..., confidence)
+_ENDPOINT_FIELDS = tuple(f.name for f in fields(APIEndpoint))
+
+def _endpoint_to_json(obj):
+    """json.dumps default hook: serialize APIEndpoint without a dict per report."""
+    if isinstance(obj, APIEndpoint):
+        return {name: getattr(obj, name) for name in _ENDPOINT_FIELDS}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dump_json(data) -> bytes:
+    """Serialize a report to UTF-8 JSON with two-space indentation."""
+    if orjson is not None:
+        # orjson serializes dataclasses natively, in field order
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False, default=_endpoint_to_json).encode('utf-8')
+
+def _descending_confidence(endpoint: APIEndpoint) -> float:
+    """bisect key that makes a confidence-descending list ascending."""
+    return -endpoint.confidence
+
+def _confidence_level(confidence: float) -> int:
+    """Bucket index for a confidence: 0 low, 1 medium, 2 high."""
+    return (confidence >= 0.5) + (confidence >= 0.8)
+
+def _snapshot(endpoints: List[APIEndpoint]) -> tuple:
+    """Identity and confidence of each endpoint, in order.
     
-    def generate_html_report(self, endpoints: List[APIEndpoint], target_url: str, output_file: str = None) -> str:
-        """Generate an HTML report of discovered endpoints."""
-        # Sort by confidence
-        sorted_endpoints = sorted(endpoints, key=lambda x: x.confidence, reverse=True)
-        
-        html_template = '''
+    Compared instead of the list's id so in-place edits are noticed; the
+    prepared lists hold the endpoints, so their ids cannot be reused.
+    """
+    return tuple((id(endpoint), endpoint.confidence) for endpoint in endpoints)
+
+# Escapes for text content; str.translate runs the whole string in one C pass
+_HTML_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# CSS classes indexed by _confidence_level()
+_CONFIDENCE_CLASSES = ('low-confidence', 'medium-confidence', 'high-confidence')
+
+# Parsed once; $-placeholders leave the stylesheet's braces alone
+_HTML_TEMPLATE = string.Template('''
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -175,143 +154,287 @@ class Reporter:
         <h1>🔍 API Hunter Report</h1>
         
         <div class="summary">
-            <strong>Target URL:</strong> {target_url}<br>
-            <strong>Scan Time:</strong> {timestamp}<br>
-            <strong>Total Endpoints Found:</strong> {total_endpoints}
+            <strong>Target URL:</strong> $target_url<br>
+            <strong>Scan Time:</strong> $timestamp<br>
+            <strong>Total Endpoints Found:</strong> $total_endpoints
         </div>
         
         <h2>Discovered API Endpoints</h2>
-        {endpoints_html}
+        $endpoints_html
     </div>
 </body>
 </html>
-        '''
-        
-        endpoints_html = ''
-        for endpoint in sorted_endpoints:
-            # Determine confidence class
-            if endpoint.confidence >= 0.8:
-                confidence_class = 'high-confidence'
-            elif endpoint.confidence >= 0.5:
-                confidence_class = 'medium-confidence'
+        ''')
+
+# Split around the endpoint list so the fragments can be streamed in between
+_HTML_HEAD = string.Template(_HTML_TEMPLATE.template.partition('$endpoints_html')[0])
+_HTML_TAIL = _HTML_TEMPLATE.template.partition('$endpoints_html')[2]
+
+class Reporter:
+    """Generate reports from discovered API endpoints."""
+    
+    def __init__(self):
+        # One clock read per Reporter so every format reports the same scan time
+        now = datetime.now()
+        self.timestamp = now.isoformat()
+        self._human_ts = now.strftime('%Y-%m-%d %H:%M:%S')
+        self._prepared = None
+    
+    def prepare(self, endpoints: List[APIEndpoint]) -> List[APIEndpoint]:
+        """Sort and bucket endpoints once so every report format can reuse them."""
+        sorted_endpoints = sorted(endpoints, key=_BY_CONFIDENCE, reverse=True)
+        # Descending order makes each bucket a contiguous slice; negating the
+        # key lets bisect count the endpoints at or above each threshold
+        high_end = bisect.bisect_right(sorted_endpoints, -0.8, key=_descending_confidence)
+        medium_end = bisect.bisect_right(sorted_endpoints, -0.5, high_end, key=_descending_confidence)
+        buckets = (
+            sorted_endpoints[medium_end:],
+            sorted_endpoints[high_end:medium_end],
+            sorted_endpoints[:high_end]
+        )
+        
+        self._prepared = (_snapshot(endpoints), sorted_endpoints, buckets)
+        return sorted_endpoints
+    
+    def _view(self, endpoints: List[APIEndpoint]):
+        """Return (sorted endpoints, (low, medium, high)), reusing prepare()'s work."""
+        prepared = self._prepared
+        if prepared is None or prepared[0] != _snapshot(endpoints):
+            self.prepare(endpoints)
+            prepared = self._prepared
+        return prepared[1], prepared[2]
+    
+    def generate_json_report(self, endpoints: List[APIEndpoint], output_file: str = None,
+                             return_content: bool = True) -> str:
+        """Generate a JSON report of discovered endpoints.
+        
+        With an output_file and return_content=False, the report is written
+        straight to disk and an empty string is returned instead of the JSON text.
+        """
+        # Sorted by confidence (cached across report formats); the endpoints
+        # themselves are handed to the serializer, no per-endpoint dicts
+        sorted_endpoints, _ = self._view(endpoints)
+        report_data = {
+            'timestamp': self.timestamp,
+            'total_endpoints': len(endpoints),
+            'endpoints': sorted_endpoints
+        }
+        
+        if output_file and not return_content:
+            if orjson is not None:
+                # No incremental encoder, but the bytes skip the str copy
+                with open(output_file, 'wb') as f:
+                    f.write(_dump_json(report_data))
             else:
-                confidence_class = 'low-confidence'
-            
-            # Parameters HTML
-            params_html = ''
-            if endpoint.parameters:
-                params_html = '<div class="parameters"><strong>Parameters:</strong> '
-                for param in endpoint.parameters:
-                    params_html += f'<span class="param-tag">{param}</span>'
-                params_html += '</div>'
-            
-            endpoint_html = f'''
+                with open(output_file, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+                    json.dump(report_data, f, indent=2, ensure_ascii=False, default=_endpoint_to_json)
+            return ''
+        
+        json_bytes = _dump_json(report_data)
+        
+        if output_file:
+            with open(output_file, 'wb') as f:
+                f.write(json_bytes)
+                
+        return json_bytes.decode('utf-8')
+    
+    def generate_csv_report(self, endpoints: List[APIEndpoint], output_file: str = None,
+                            return_content: bool = True) -> str:
+        """Generate a CSV report of discovered endpoints.
+        
+        With an output_file and return_content=False, rows are streamed straight
+        to disk and an empty string is returned instead of the CSV text.
+        """
+        # Sorted by confidence (cached across report formats)
+        sorted_endpoints, _ = self._view(endpoints)
+        
+        header = ('URL', 'Method', 'Parameters', 'Source', 'Confidence', 'Headers')
+        rows = (
+            (
+                endpoint.url,
+                endpoint.method,
+                ', '.join(endpoint.parameters) if endpoint.parameters else '',
+                endpoint.source,
+                f'{endpoint.confidence:.2f}',
+                json.dumps(endpoint.headers) if endpoint.headers else ''
+            )
+            for endpoint in sorted_endpoints
+        )
+        
+        if output_file and not return_content:
+            with open(output_file, 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+            return ''
+        
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(header)
+        writer.writerows(rows)
+        csv_content = output.getvalue()
+        output.close()
+        
+        if output_file:
+            with open(output_file, 'w', newline='', encoding='utf-8') as f:
+                f.write(csv_content)
+                
+        return csv_content
+    
+    def generate_html_report(self, endpoints: List[APIEndpoint], target_url: str, output_file: str = None,
+                             return_content: bool = True) -> str:
+        """Generate an HTML report of discovered endpoints.
+        
+        With an output_file and return_content=False, endpoint fragments are
+        streamed straight to disk and an empty string is returned instead.
+        """
+        # Sorted by confidence (cached across report formats)
+        sorted_endpoints, _ = self._view(endpoints)
+        
+        def endpoint_fragments():
+            for endpoint in sorted_endpoints:
+                # Determine confidence class
+                confidence_class = _CONFIDENCE_CLASSES[_confidence_level(endpoint.confidence)]
+                
+                # Parameters HTML
+                params_html = ''
+                if endpoint.parameters:
+                    params_html = ''.join([
+                        '<div class="parameters"><strong>Parameters:</strong> ',
+                        *(f'<span class="param-tag">{param.translate(_HTML_TEXT_ESCAPES)}</span>'
+                          for param in endpoint.parameters),
+                        '</div>'
+                    ])
+                
+                # The method also lands in a class attribute, so quotes are escaped too
+                method = escape(endpoint.method)
+                yield f'''
             <div class="endpoint">
                 <div class="endpoint-header">
-                    <span class="method {endpoint.method}">{endpoint.method}</span>
+                    <span class="method {method}">{method}</span>
                     <span class="confidence {confidence_class}">Confidence: {endpoint.confidence:.2f}</span>
                 </div>
-                <div class="url">{endpoint.url}</div>
-                <div class="source">Source: {endpoint.source}</div>
+                <div class="url">{endpoint.url.translate(_HTML_TEXT_ESCAPES)}</div>
+                <div class="source">Source: {endpoint.source.translate(_HTML_TEXT_ESCAPES)}</div>
                 {params_html}
             </div>
             '''
-            endpoints_html += endpoint_html
         
-        html_output = html_template.format(
-            target_url=target_url,
+        head = _HTML_HEAD.safe_substitute(
+            target_url=target_url.translate(_HTML_TEXT_ESCAPES),
             timestamp=self.timestamp,
-            total_endpoints=len(endpoints),
-            endpoints_html=endpoints_html
+            total_endpoints=len(endpoints)
         )
         
+        if output_file and not return_content:
+            with open(output_file, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+                f.write(head)
+                f.writelines(endpoint_fragments())
+                f.write(_HTML_TAIL)
+            return ''
+        
+        html_output = ''.join((head, *endpoint_fragments(), _HTML_TAIL))
+        
         if output_file:
             with open(output_file, 'w', encoding='utf-8') as f:
                 f.write(html_output)
                 
         return html_output
     
-    def generate_simple_list(self, endpoints: List[APIEndpoint], output_file: str = None) -> str:
-        """Generate a simple list of endpoints, one per line."""
+    def generate_simple_list(self, endpoints: List[APIEndpoint], output_file: str = None,
+                             return_content: bool = True) -> str:
+        """Generate a simple list of endpoints, one per line.
+        
+        With an output_file and return_content=False, lines are streamed straight
+        to disk and an empty string is returned instead of the list text.
+        """
         if not endpoints:
             return "No API endpoints discovered."
         
-        # Sort by confidence
-        sorted_endpoints = sorted(endpoints, key=lambda x: x.confidence, reverse=True)
+        # Sorted by confidence (cached across report formats)
+        sorted_endpoints, _ = self._view(endpoints)
         
-        lines = []
-        lines.append(f"# API Endpoints discovered on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append(f"# Total endpoints: {len(endpoints)}")
-        lines.append("")
+        def lines():
+            yield f"# API Endpoints discovered on {self._human_ts}"
+            yield f"# Total endpoints: {len(endpoints)}"
+            yield ""
+            for endpoint in sorted_endpoints:
+                yield endpoint.url
         
-        for endpoint in sorted_endpoints:
-            lines.append(f"{endpoint.url}")
-        
-        output = "\n".join(lines)
-        
-        if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(output)
-        
-        return output
+        return self._emit_lines(lines(), output_file, return_content)
     
-    def generate_detailed_list(self, endpoints: List[APIEndpoint], target_url: str, output_file: str = None) -> str:
-        """Generate a detailed text list with comprehensive endpoint information."""
+    def generate_detailed_list(self, endpoints: List[APIEndpoint], target_url: str, output_file: str = None,
+                               return_content: bool = True) -> str:
+        """Generate a detailed text list with comprehensive endpoint information.
+        
+        With an output_file and return_content=False, lines are streamed straight
+        to disk and an empty string is returned instead of the report text.
+        """
         if not endpoints:
             return "No API endpoints discovered."
         
-        # Sort by confidence
-        sorted_endpoints = sorted(endpoints, key=lambda x: x.confidence, reverse=True)
-        
-        lines = []
-        lines.append("=" * 80)
-        lines.append(f"API ENDPOINTS DISCOVERY REPORT")
-        lines.append("=" * 80)
-        lines.append(f"Target URL: {target_url}")
-        lines.append(f"Scan Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append(f"Total Endpoints Found: {len(endpoints)}")
-        lines.append("=" * 80)
-        lines.append("")
+        # Sorted by confidence (cached across report formats)
+        sorted_endpoints, buckets = self._view(endpoints)
         
         # Group by confidence level
-        high_conf = [e for e in sorted_endpoints if e.confidence >= 0.8]
-        medium_conf = [e for e in sorted_endpoints if 0.5 <= e.confidence < 0.8]
-        low_conf = [e for e in sorted_endpoints if e.confidence < 0.5]
+        low_conf, medium_conf, high_conf = buckets
         
-        def add_endpoint_section(title, endpoints_list, emoji):
+        def endpoint_section(title, endpoints_list, emoji):
             if endpoints_list:
-                lines.append(f"{emoji} {title} ({len(endpoints_list)} endpoints)")
-                lines.append("-" * 60)
+                yield f"{emoji} {title} ({len(endpoints_list)} endpoints)"
+                yield "-" * 60
                 
                 for i, endpoint in enumerate(endpoints_list, 1):
-                    lines.append(f"{i:2d}. URL: {endpoint.url}")
-                    lines.append(f"    Method: {endpoint.method}")
-                    lines.append(f"    Source: {endpoint.source}")
-                    lines.append(f"    Confidence: {endpoint.confidence:.2f}")
+                    yield f"{i:2d}. URL: {endpoint.url}"
+                    yield f"    Method: {endpoint.method}"
+                    yield f"    Source: {endpoint.source}"
+                    yield f"    Confidence: {endpoint.confidence:.2f}"
                     
                     if endpoint.parameters:
-                        lines.append(f"    Parameters: {', '.join(endpoint.parameters)}")
+                        yield f"    Parameters: {', '.join(endpoint.parameters)}"
                     
                     if endpoint.headers:
-                        lines.append(f"    Headers: {endpoint.headers}")
+                        yield f"    Headers: {endpoint.headers}"
                     
-                    lines.append("")
+                    yield ""
                 
-                lines.append("")
-        
-        add_endpoint_section("HIGH CONFIDENCE ENDPOINTS", high_conf, "🟢")
-        add_endpoint_section("MEDIUM CONFIDENCE ENDPOINTS", medium_conf, "🟡")
-        add_endpoint_section("LOW CONFIDENCE ENDPOINTS", low_conf, "🟠")
-        
-        # Summary
-        lines.append("=" * 80)
-        lines.append("SUMMARY")
-        lines.append("=" * 80)
-        lines.append(f"High Confidence: {len(high_conf)} endpoints")
-        lines.append(f"Medium Confidence: {len(medium_conf)} endpoints")
-        lines.append(f"Low Confidence: {len(low_conf)} endpoints")
-        lines.append(f"Total: {len(endpoints)} endpoints")
-        lines.append("=" * 80)
+                yield ""
+        
+        def lines():
+            yield "=" * 80
+            yield "API ENDPOINTS DISCOVERY REPORT"
+            yield "=" * 80
+            yield f"Target URL: {target_url}"
+            yield f"Scan Date: {self._human_ts}"
+            yield f"Total Endpoints Found: {len(endpoints)}"
+            yield "=" * 80
+            yield ""
+            
+            yield from endpoint_section("HIGH CONFIDENCE ENDPOINTS", high_conf, "🟢")
+            yield from endpoint_section("MEDIUM CONFIDENCE ENDPOINTS", medium_conf, "🟡")
+            yield from endpoint_section("LOW CONFIDENCE ENDPOINTS", low_conf, "🟠")
+            
+            # Summary
+            yield "=" * 80
+            yield "SUMMARY"
+            yield "=" * 80
+            yield f"High Confidence: {len(high_conf)} endpoints"
+            yield f"Medium Confidence: {len(medium_conf)} endpoints"
+            yield f"Low Confidence: {len(low_conf)} endpoints"
+            yield f"Total: {len(endpoints)} endpoints"
+            yield "=" * 80
+        
+        return self._emit_lines(lines(), output_file, return_content)
+    
+    @staticmethod
+    def _emit_lines(lines: Iterator[str], output_file: Optional[str], return_content: bool) -> str:
+        """Join report lines with newlines, or stream them to output_file."""
+        if output_file and not return_content:
+            with open(output_file, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+                # Same layout as "\n".join(): separators only between lines
+                f.write(next(lines, ''))
+                f.writelines('\n' + line for line in lines)
+            return ''
         
         output = "\n".join(lines)
         
@@ -326,20 +449,18 @@ class Reporter:
         if not endpoints:
             return "No API endpoints discovered."
         
-        # Sort by confidence
-        sorted_endpoints = sorted(endpoints, key=lambda x: x.confidence, reverse=True)
+        # Sorted by confidence (cached across report formats)
+        sorted_endpoints, buckets = self._view(endpoints)
         
         output = []
-        output.append(f"\\n🔍 API Hunter Results ({len(endpoints)} endpoints found)")
+        output.append(f"\n🔍 API Hunter Results ({len(endpoints)} endpoints found)")
         output.append("=" * 60)
         
         # Group by confidence level
-        high_conf = [e for e in sorted_endpoints if e.confidence >= 0.8]
-        medium_conf = [e for e in sorted_endpoints if 0.5 <= e.confidence < 0.8]
-        low_conf = [e for e in sorted_endpoints if e.confidence < 0.5]
+        low_conf, medium_conf, high_conf = buckets
         
         if high_conf:
-            output.append("\\n🟢 HIGH CONFIDENCE ENDPOINTS:")
+            output.append("\n🟢 HIGH CONFIDENCE ENDPOINTS:")
             for endpoint in high_conf:
                 output.append(f"  [{endpoint.method}] {endpoint.url}")
                 output.append(f"      Source: {endpoint.source} | Confidence: {endpoint.confidence:.2f}")
@@ -347,18 +468,18 @@ class Reporter:
                     output.append(f"      Parameters: {', '.join(endpoint.parameters)}")
         
         if medium_conf:
-            output.append("\\n🟡 MEDIUM CONFIDENCE ENDPOINTS:")
+            output.append("\n🟡 MEDIUM CONFIDENCE ENDPOINTS:")
             for endpoint in medium_conf:
                 output.append(f"  [{endpoint.method}] {endpoint.url}")
                 output.append(f"      Source: {endpoint.source} | Confidence: {endpoint.confidence:.2f}")
         
         if low_conf:
-            output.append("\\n🟠 LOW CONFIDENCE ENDPOINTS:")
+            output.append("\n🟠 LOW CONFIDENCE ENDPOINTS:")
             for endpoint in low_conf:
                 output.append(f"  [{endpoint.method}] {endpoint.url}")
                 output.append(f"      Source: {endpoint.source} | Confidence: {endpoint.confidence:.2f}")
         
-        output.append("\\n" + "=" * 60)
+        output.append("\n" + "=" * 60)
         output.append(f"Summary: {len(high_conf)} high, {len(medium_conf)} medium, {len(low_conf)} low confidence")
         
-        return "\\n".join(output)
\ No newline at end of file
+        return "\n".join(output)
\ No newline at end of file
@@ -3,15 +3,56 @@
 import re
 import json
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Set
-from .core import APIEndpoint
+import requests
+import xml.etree.ElementTree as ET
+from urllib3.exceptions import HTTPError as Urllib3Error
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Set, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from .auth import mount_pooled_adapter
+from .core import (
+    APIEndpoint, SOURCE_ROBOTS_TXT, SOURCE_SITEMAP, SOURCE_SWAGGER_DOCS,
+    SOURCE_SWAGGER_SPEC, SOURCE_PATH_SCAN
+)
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Substrings that mark a robots/sitemap path as API-like
+_API_PATH_RE = re.compile(
+    'api|rest|graphql|endpoint|service|json|xml|data|ajax|fetch|webhook', re.IGNORECASE
+)
+
+# Redirect targets that mean "log in first" rather than "the resource moved";
+# anchored so API paths such as /api/v1/auth/token are not mistaken for one
+_LOGIN_PATH_RE = re.compile(
+    r'/(?:(?:accounts?|users?)/)?(?:log[-_]?in|sign[-_]?in|auth|sso)(?:[/.]|$)', re.IGNORECASE
+)
+
+# Redirects followed from a probe before giving up on it
+_MAX_REDIRECT_HOPS = 3
+
+# Path of each Allow/Disallow rule in robots.txt, one scan over the whole file
+_ROBOTS_RULE_RE = re.compile(r'^[ \t]*(?:Disallow|Allow):[ \t]*(.*?)[ \t\r]*$', re.MULTILINE)
+
+_SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+_SITEMAP_URL_TAG = _SITEMAP_NS + 'url'
+_SITEMAP_LOC_TAG = _SITEMAP_NS + 'loc'
 
 class EndpointScanner:
     """Advanced scanner for discovering API endpoints."""
     
-    def __init__(self, max_workers: int = 5):
+    def __init__(self, max_workers: int = 32, session: Optional[requests.Session] = None):
         self.max_workers = max_workers
+        # Default session for scans called without one; sized so every
+        # worker keeps its own keep-alive connection instead of reconnecting.
+        # A caller-supplied session keeps the adapters it already has.
+        if session is None:
+            session = requests.Session()
+            mount_pooled_adapter(session, pool_maxsize=max(32, max_workers))
+        self.session = session
         
         # Common API file extensions and patterns
         self.api_extensions = ['.json', '.xml', '.api', '.rest', '.graphql']
@@ -22,53 +63,67 @@ class EndpointScanner:
             '/client/api', '/client/api/sponds', '/client/api/events',
             '/client/api/groups', '/client/api/user', '/client/api/notifications'
         ]
+        self.swagger_paths = [
+            '/swagger.json',
+            '/swagger.yaml',
+            '/api-docs',
+            '/api-docs.json',
+            '/openapi.json',
+            '/openapi.yaml',
+            '/v1/api-docs',
+            '/v2/api-docs',
+            '/swagger/v1/swagger.json',
+            '/swagger-ui.html',
+            '/docs'
+        ]
+        
+        # url -> (status, content type, location) of a HEAD probe, None if it
+        # failed. Redirects are followed hop by hop through this cache, so the
+        # common-path and documentation scans share one deduplicated probe set
+        # and repeated scans skip the request.
+        self._probe_cache: Dict[str, Optional[Tuple[int, str, str]]] = {}
+        # url -> parsed Swagger/OpenAPI document
+        self._swagger_cache: Dict[str, dict] = {}
         
-    def scan_common_paths(self, base_url: str, session) -> List[APIEndpoint]:
+    def scan_common_paths(self, base_url: str, session=None) -> List[APIEndpoint]:
         """Scan common API paths."""
-        endpoints = []
+        session = session or self.session
+        base = base_url.rstrip('/')
+        urls = [base + path for path in self.common_paths]
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-            
-            for path in self.common_paths:
-                url = base_url.rstrip('/') + path
-                future = executor.submit(self._test_endpoint, url, session)
-                futures.append(future)
-                
-            for future in as_completed(futures):
-                result = future.result()
-                if result:
-                    endpoints.append(result)
-                    
-        return endpoints
+        # One worker per probe so the whole batch costs about one round trip;
+        # the session's pooled adapter keeps the connections alive between batches
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(urls)))) as executor:
+            results = executor.map(lambda url: self._test_endpoint(url, session), urls)
+            return [result for result in results if result]
     
-    def scan_robots_txt(self, base_url: str, session) -> List[APIEndpoint]:
+    def scan_robots_txt(self, base_url: str, session=None) -> List[APIEndpoint]:
         """Scan robots.txt for potential API paths."""
+        session = session or self.session
         endpoints = []
         robots_url = base_url.rstrip('/') + '/robots.txt'
         
         try:
             response = session.get(robots_url, timeout=5)
             if response.status_code == 200:
-                lines = response.text.split('\\n')
-                for line in lines:
-                    if line.strip().startswith('Disallow:') or line.strip().startswith('Allow:'):
-                        path = line.split(':', 1)[1].strip()
-                        if self._looks_like_api_path(path):
-                            full_url = base_url.rstrip('/') + path
-                            endpoint = APIEndpoint(
-                                url=full_url,
-                                source='robots_txt',
-                                confidence=0.6
-                            )
-                            endpoints.append(endpoint)
-        except:
+                for match in _ROBOTS_RULE_RE.finditer(response.text):
+                    path = match.group(1)
+                    if self._looks_like_api_path(path):
+                        full_url = base_url.rstrip('/') + path
+                        endpoint = APIEndpoint(
+                            url=full_url,
+                            source=SOURCE_ROBOTS_TXT,
+                            confidence=0.6
+                        )
+                        endpoints.append(endpoint)
+        except requests.RequestException:
             pass
             
         return endpoints
     
-    def scan_sitemap(self, base_url: str, session) -> List[APIEndpoint]:
+    def scan_sitemap(self, base_url: str, session=None) -> List[APIEndpoint]:
         """Scan sitemap.xml for API endpoints."""
+        session = session or self.session
         endpoints = []
         sitemap_urls = [
             '/sitemap.xml',
@@ -79,107 +134,181 @@ class EndpointScanner:
         for sitemap_path in sitemap_urls:
             sitemap_url = base_url.rstrip('/') + sitemap_path
             try:
-                response = session.get(sitemap_url, timeout=5)
-                if response.status_code == 200:
-                    # Parse XML and look for API-like URLs
-                    import xml.etree.ElementTree as ET
-                    try:
-                        root = ET.fromstring(response.text)
-                        for url_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}url'):
-                            loc_elem = url_elem.find('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                            if loc_elem is not None and loc_elem.text:
-                                if self._looks_like_api_path(loc_elem.text):
-                                    endpoint = APIEndpoint(
-                                        url=loc_elem.text,
-                                        source='sitemap',
-                                        confidence=0.7
-                                    )
-                                    endpoints.append(endpoint)
-                    except ET.ParseError:
-                        pass
-            except:
+                with session.get(sitemap_url, stream=True, timeout=5) as response:
+                    if response.status_code == 200:
+                        endpoints.extend(self._iter_sitemap_endpoints(response))
+            # iterparse reads response.raw, so mid-stream failures surface as urllib3 errors
+            except (requests.RequestException, Urllib3Error):
                 continue
                 
         return endpoints
     
-    def discover_swagger_docs(self, base_url: str, session) -> List[APIEndpoint]:
+    def _iter_sitemap_endpoints(self, response):
+        """Yield API-like <loc> URLs while the sitemap body is still streaming."""
+        # Let urllib3 undo gzip/deflate before the parser sees the bytes
+        response.raw.decode_content = True
+        try:
+            for _, elem in ET.iterparse(response.raw, events=('end',)):
+                if elem.tag != _SITEMAP_URL_TAG:
+                    continue
+                loc = elem.findtext(_SITEMAP_LOC_TAG)
+                if loc and self._looks_like_api_path(loc):
+                    yield APIEndpoint(
+                        url=loc,
+                        source=SOURCE_SITEMAP,
+                        confidence=0.7
+                    )
+                # Drop the finished <url> subtree so memory stays flat
+                elem.clear()
+        except ET.ParseError:
+            pass
+    
+    def discover_swagger_docs(self, base_url: str, session=None) -> List[APIEndpoint]:
         """Discover Swagger/OpenAPI documentation endpoints."""
-        endpoints = []
-        swagger_paths = [
-            '/swagger.json',
-            '/swagger.yaml',
-            '/api-docs',
-            '/api-docs.json',
-            '/openapi.json',
-            '/openapi.yaml',
-            '/v1/api-docs',
-            '/v2/api-docs',
-            '/swagger/v1/swagger.json',
-            '/swagger-ui.html',
-            '/docs'
-        ]
+        session = session or self.session
+        base = base_url.rstrip('/')
         
-        for path in swagger_paths:
-            url = base_url.rstrip('/') + path
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(self.swagger_paths)))) as executor:
+            results = executor.map(lambda path: self._probe_swagger(base, path, session), self.swagger_paths)
+            return [endpoint for endpoints in results for endpoint in endpoints]
+    
+    def _probe_swagger(self, base: str, path: str, session) -> List[APIEndpoint]:
+        """Probe one documentation path, expanding JSON specs into endpoints."""
+        url = base + path
+        # Docs are often served behind a redirect, so follow it here
+        probe = self._follow_redirects(url, self._head(url, session), session)
+        response = None
+        if probe is None or not 200 <= probe[0] < 300:
+            # Many doc servers reject HEAD (404, 403, 405, 501...); confirm with GET
             try:
                 response = session.get(url, timeout=5)
-                if response.status_code == 200:
-                    endpoint = APIEndpoint(
-                        url=url,
-                        source='swagger_docs',
-                        confidence=0.9
-                    )
-                    endpoints.append(endpoint)
-                    
-                    # If it's a JSON swagger doc, parse it for more endpoints
-                    if 'json' in path and response.headers.get('content-type', '').startswith('application/json'):
-                        try:
-                            swagger_data = response.json()
-                            if 'paths' in swagger_data:
-                                base_path = swagger_data.get('basePath', '')
-                                for path_key in swagger_data['paths']:
-                                    api_url = base_url.rstrip('/') + base_path + path_key
-                                    for method in swagger_data['paths'][path_key]:
-                                        endpoint = APIEndpoint(
-                                            url=api_url,
-                                            method=method.upper(),
-                                            source='swagger_spec',
-                                            confidence=1.0
-                                        )
-                                        endpoints.append(endpoint)
-                        except (json.JSONDecodeError, KeyError):
-                            pass
-            except:
-                continue
-                
+            except requests.RequestException:
+                return []
+            probe = (response.status_code, response.headers.get('content-type', ''), '')
+        
+        if not 200 <= probe[0] < 300:
+            return []
+        
+        endpoints = [APIEndpoint(
+            url=url,
+            source=SOURCE_SWAGGER_DOCS,
+            confidence=0.9
+        )]
+        
+        # If it's a JSON swagger doc, parse it for more endpoints
+        if 'json' in path and probe[1].startswith('application/json'):
+            swagger_data = self._load_swagger(url, session, response)
+            try:
+                if swagger_data and 'paths' in swagger_data:
+                    base_path = swagger_data.get('basePath', '')
+                    for path_key in swagger_data['paths']:
+                        api_url = base + base_path + path_key
+                        for method in swagger_data['paths'][path_key]:
+                            endpoint = APIEndpoint(
+                                url=api_url,
+                                method=method.upper(),
+                                source=SOURCE_SWAGGER_SPEC,
+                                confidence=1.0
+                            )
+                            endpoints.append(endpoint)
+            except (KeyError, TypeError, AttributeError):
+                pass
+        
         return endpoints
     
+    def _load_swagger(self, url: str, session, response=None) -> Optional[dict]:
+        """Fetch and parse a JSON spec once per URL."""
+        if url in self._swagger_cache:
+            return self._swagger_cache[url]
+        
+        try:
+            if response is None:
+                response = session.get(url, timeout=5)
+            # Parse the raw bytes; both parsers detect UTF-8 themselves
+            swagger_data = _json_loads(response.content)
+        except (requests.RequestException, ValueError):
+            return None
+        if not isinstance(swagger_data, dict):
+            return None
+        
+        self._swagger_cache[url] = swagger_data
+        return swagger_data
+    
+    def _head(self, url: str, session) -> Optional[Tuple[int, str, str]]:
+        """HEAD a URL once per scanner, returning (status, content type, location)."""
+        if url in self._probe_cache:
+            return self._probe_cache[url]
+        
+        try:
+            response = session.head(url, timeout=3, allow_redirects=False)
+            result = (
+                response.status_code,
+                response.headers.get('content-type', ''),
+                response.headers.get('location', '')
+            )
+        except requests.RequestException:
+            result = None
+        self._probe_cache[url] = result
+        return result
+    
+    def _follow_redirects(self, url: str, probe: Optional[Tuple[int, str, str]], session) -> Optional[Tuple[int, str, str]]:
+        """Follow a probe's redirects through the probe cache, up to _MAX_REDIRECT_HOPS."""
+        for _ in range(_MAX_REDIRECT_HOPS):
+            if probe is None or not 300 <= probe[0] < 400 or not probe[2]:
+                return probe
+            url = urljoin(url, probe[2])
+            probe = self._head(url, session)
+        return probe
+    
     def _test_endpoint(self, url: str, session) -> APIEndpoint:
         """Test if an endpoint exists and returns API-like content."""
-        try:
-            response = session.head(url, timeout=3, allow_redirects=True)
-            if response.status_code < 400:
-                content_type = response.headers.get('content-type', '').lower()
+        probe = self._head(url, session)
+        if probe is not None and 300 <= probe[0] < 400:
+            probe = self._resolve_redirect(url, probe, session)
+        if probe is not None and probe[0] < 400:
+            content_type = probe[1].lower()
+            
+            confidence = 0.5
+            if any(ct in content_type for ct in ['json', 'xml', 'api']):
+                confidence = 0.8
                 
-                confidence = 0.5
-                if any(ct in content_type for ct in ['json', 'xml', 'api']):
-                    confidence = 0.8
-                    
-                return APIEndpoint(
-                    url=url,
-                    source='path_scan',
-                    confidence=confidence
-                )
-        except:
-            pass
+            return APIEndpoint(
+                url=url,
+                source=SOURCE_PATH_SCAN,
+                confidence=confidence
+            )
+        return None
+    
+    def _resolve_redirect(self, url: str, probe: Tuple[int, str, str], session) -> Optional[Tuple[int, str, str]]:
+        """Decide what a redirect from a probed path says about that path.
+        
+        Catch-all redirects (to the home page, a login form or an error page)
+        must not count as hits. A hop that stays on the same path (e.g. /api ->
+        /api/) is taken at face value and one to the site root or a login page
+        means the path doesn't exist; anything else (such as an http -> https
+        upgrade) is followed, up to _MAX_REDIRECT_HOPS, until a 2xx answers.
+        """
+        current = url
+        for _ in range(_MAX_REDIRECT_HOPS):
+            location = probe[2]
+            if not location:
+                return None
+            target = urljoin(current, location)
+            here, moved = urlsplit(current), urlsplit(target)
+            
+            if moved.path in ('', '/') or _LOGIN_PATH_RE.match(moved.path):
+                return None
+            if moved[:2] == here[:2] and moved.path.rstrip('/') == here.path.rstrip('/'):
+                return probe
+            
+            probe = self._head(target, session)
+            if probe is None or probe[0] >= 400:
+                return None
+            if probe[0] < 300:
+                return probe
+            current = target
         return None
     
     def _looks_like_api_path(self, path: str) -> bool:
         """Check if a path looks like it could be an API endpoint."""
-        api_indicators = [
-            'api', 'rest', 'graphql', 'endpoint', 'service',
-            'json', 'xml', 'data', 'ajax', 'fetch', 'webhook'
-        ]
-        
-        path_lower = path.lower()
-        return any(indicator in path_lower for indicator in api_indicators)
\ No newline at end of file
+        return _API_PATH_RE.search(path) is not None
\ No newline at end of file
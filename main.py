@@ -5,13 +5,99 @@ A tool for discovering API endpoints from web pages
 """
 
 import argparse
+import functools
+import json
+import logging
+import os
 import sys
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlparse
 
-from api_hunter import APIDiscovery, EndpointScanner, Reporter, Authenticator
+# requests and api_hunter (bs4, lxml, urllib3) are imported inside main()
+# once the arguments are valid, so --help and usage errors return quickly
+if TYPE_CHECKING:
+    from api_hunter import EndpointScanner
 
-def main():
+# Schemes accepted for the target URL
+_URL_SCHEMES = ('http://', 'https://')
+
+# Characters of a netloc that can't appear in the report filename
+_NETLOC_SAFE = str.maketrans({':': '_', '.': '_', '/': '_'})
+
+# --auto-save filename (prefix, extension) per output format
+_AUTOSAVE_SPEC = {
+    'json': ('api_endpoints', '.json'),
+    'csv': ('api_endpoints', '.csv'),
+    'html': ('api_endpoints', '.html'),
+    'list': ('api_endpoints', '.txt'),
+    'detailed': ('api_detailed', '.txt'),
+}
+_AUTOSAVE_DEFAULT = ('api_endpoints', '.txt')
+
+def configure_logging(verbose: bool) -> None:
+    """Send api_hunter log messages to stdout alongside the CLI output."""
+    package_logger = logging.getLogger('api_hunter')
+    if not package_logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        package_logger.addHandler(handler)
+    package_logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+def _absorb(seen: set, unique_endpoints: list, endpoints: list) -> None:
+    """Append endpoints whose (url, method) hasn't been collected yet."""
+    for endpoint in endpoints:
+        key = (endpoint.url, endpoint.method)
+        if key not in seen:
+            seen.add(key)
+            unique_endpoints.append(endpoint)
+
+def scanner_jobs(scanner: 'EndpointScanner', args) -> list:
+    """Path-based scans selected on the command line, in report order."""
+    jobs = []
+    if args.scan_common_paths:
+        jobs.append(scanner.scan_common_paths)
+    if args.include_swagger:
+        jobs.append(scanner.discover_swagger_docs)
+    jobs.append(scanner.scan_robots_txt)
+    jobs.append(scanner.scan_sitemap)
+    return jobs
+
+def _validate(args) -> Optional[int]:
+    """Pre-flight checks on parsed arguments; returns an exit code on failure.
+    
+    --cookies and --auth-headers are replaced by their decoded dicts.
+    """
+    # Scheme match is case-insensitive; 8 chars covers 'https://'
+    if not args.url[:8].lower().startswith(_URL_SCHEMES):
+        print("Error: URL must start with http:// or https://", file=sys.stderr)
+        return 1
+    
+    # Chained comparison also rejects NaN
+    if not 0.0 <= args.confidence_threshold <= 1.0:
+        print("Error: Confidence threshold must be between 0.0 and 1.0", file=sys.stderr)
+        return 1
+    
+    # Decode the JSON options once; the auth branches use the dicts directly
+    try:
+        args.cookies = json.loads(args.cookies) if args.cookies else None
+    except json.JSONDecodeError:
+        print("❌ Invalid cookies JSON format")
+        return 1
+    
+    try:
+        args.auth_headers = json.loads(args.auth_headers) if args.auth_headers else None
+    except json.JSONDecodeError:
+        print("❌ Invalid headers JSON format")
+        return 1
+    
+    return None
+
+@functools.lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser (once per process)."""
     parser = argparse.ArgumentParser(
         description='API Hunter - Discover API endpoints from web pages',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -44,6 +130,12 @@ Examples:
         help='Automatically save results to timestamped file'
     )
     
+    parser.add_argument(
+        '--also-print',
+        action='store_true',
+        help='With the console format, also print the report when saving it to a file'
+    )
+    
     parser.add_argument(
         '--format', '-f',
         choices=['console', 'json', 'csv', 'html', 'list', 'detailed'],
@@ -83,6 +175,17 @@ Examples:
         help='Minimum confidence threshold (0.0-1.0, default: 0.0)'
     )
     
+    parser.add_argument(
+        '--cache-dir',
+        help='Directory for the ETag/Last-Modified response cache used on re-scans (default: ~/.cache/apihunter)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the on-disk response cache'
+    )
+    
     # Authentication arguments
     auth_group = parser.add_argument_group('Authentication options')
     auth_group.add_argument(
@@ -107,6 +210,18 @@ Examples:
         help='Custom login endpoint (for generic login)'
     )
     
+    auth_group.add_argument(
+        '--parallel-login',
+        action='store_true',
+        help='Try all discovered API login endpoints concurrently (sends credentials to each)'
+    )
+    
+    auth_group.add_argument(
+        '--no-auth-cache',
+        action='store_true',
+        help='Always log in again instead of reusing credentials saved by a login in the last hour'
+    )
+    
     auth_group.add_argument(
         '--cookies',
         help='Cookies for authentication (JSON format: {"name": "value"})'
@@ -122,16 +237,19 @@ Examples:
         help='Spond authentication token for direct token-based login'
     )
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
+    configure_logging(args.verbose)
     
-    # Validate arguments
-    if not args.url.startswith(('http://', 'https://')):
-        print("Error: URL must start with http:// or https://", file=sys.stderr)
-        return 1
+    exit_code = _validate(args)
+    if exit_code is not None:
+        return exit_code
     
-    if args.confidence_threshold < 0.0 or args.confidence_threshold > 1.0:
-        print("Error: Confidence threshold must be between 0.0 and 1.0", file=sys.stderr)
-        return 1
+    from api_hunter import APIDiscovery, EndpointScanner, Reporter, Authenticator, AuthCache, CachedSession
+    from api_hunter.auth import mount_pooled_adapter
     
     try:
         # Initialize discovery
@@ -140,6 +258,19 @@ Examples:
             print(f"⚙️  Timeout: {args.timeout}s")
             print(f"📊 Confidence threshold: {args.confidence_threshold}")
         
+        # One pooled session serves login and every later request; its adapter
+        # is mounted once here and never replaced, so keep-alive connections
+        # opened during auth are reused by discovery and the scanners
+        if args.no_cache:
+            import requests
+            session = requests.Session()
+        else:
+            session = CachedSession(args.cache_dir)
+        mount_pooled_adapter(session)
+        session.headers.update({
+            'User-Agent': 'APIHunter/1.0 (API Discovery Tool)'
+        })
+        
         # Initialize authenticator
         authenticator = None
         
@@ -148,11 +279,6 @@ Examples:
             if args.verbose:
                 print("🔐 Attempting Spond token authentication...")
             
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'APIHunter/1.0 (API Discovery Tool)'
-            })
-            
             authenticator = Authenticator(session)
             login_success = authenticator.login_spond_token(args.spond_token, args.url)
             
@@ -169,22 +295,43 @@ Examples:
             if args.verbose:
                 print(f"🔐 Attempting {args.login_type} login...")
             
-            # Create a session for authentication
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'APIHunter/1.0 (API Discovery Tool)'
-            })
+            authenticator = Authenticator(session, parallel_login=args.parallel_login)
             
-            authenticator = Authenticator(session)
+            # Reuse credentials from a recent login instead of repeating the handshake
+            auth_cache = None if args.no_auth_cache else AuthCache(args.cache_dir)
+            origin = '{0.scheme}://{0.netloc}'.format(urlparse(args.url))
+            cache_key = (args.login_type, args.username, origin)
+            cached_login = auth_cache.load(*cache_key, args.login_endpoint) if auth_cache else None
             
-            if args.login_type == 'spond':
-                login_success = authenticator.login_spond(args.username, args.password, args.url)
-            else:
-                additional_data = {}
-                login_success = authenticator.login_generic(
-                    args.username, args.password, args.url, 
-                    args.login_endpoint, additional_data
-                )
+            if cached_login:
+                authenticator.login_with_cookies(cached_login['cookies'])
+                if cached_login['headers']:
+                    authenticator.login_with_headers(cached_login['headers'])
+                # The server may have revoked or expired the session since it was saved
+                if authenticator.verify_session(args.url):
+                    if args.verbose:
+                        print("🔑 Reusing cached login")
+                    login_success = True
+                else:
+                    if args.verbose:
+                        print("🔑 Cached login no longer accepted, logging in again")
+                    auth_cache.discard(*cache_key, args.login_endpoint)
+                    authenticator.clear_credentials(list(cached_login['headers']))
+                    cached_login = None
+            
+            if not cached_login:
+                if args.login_type == 'spond':
+                    login_success = authenticator.login_spond(args.username, args.password, args.url)
+                else:
+                    additional_data = {}
+                    login_success = authenticator.login_generic(
+                        args.username, args.password, args.url, 
+                        args.login_endpoint, additional_data
+                    )
+                
+                if login_success and auth_cache:
+                    auth_cache.save(*cache_key, session.cookies, authenticator.auth_headers,
+                                    args.login_endpoint)
             
             if login_success:
                 if args.verbose:
@@ -196,75 +343,59 @@ Examples:
         
         # Handle cookie-based authentication
         elif args.cookies:
-            try:
-                import json
-                cookies = json.loads(args.cookies)
-                session = requests.Session()
-                authenticator = Authenticator(session)
-                if authenticator.login_with_cookies(cookies):
-                    if args.verbose:
-                        print("✅ Cookie authentication successful!")
-                else:
-                    authenticator = None
-            except json.JSONDecodeError:
-                print("❌ Invalid cookies JSON format")
-                return 1
+            authenticator = Authenticator(session)
+            if authenticator.login_with_cookies(args.cookies):
+                if args.verbose:
+                    print("✅ Cookie authentication successful!")
+            else:
+                authenticator = None
         
         # Handle header-based authentication
         elif args.auth_headers:
-            try:
-                import json
-                headers = json.loads(args.auth_headers)
-                session = requests.Session()
-                authenticator = Authenticator(session)
-                if authenticator.login_with_headers(headers):
-                    if args.verbose:
-                        print("✅ Header authentication successful!")
-                else:
-                    authenticator = None
-            except json.JSONDecodeError:
-                print("❌ Invalid headers JSON format")
-                return 1
+            authenticator = Authenticator(session)
+            if authenticator.login_with_headers(args.auth_headers):
+                if args.verbose:
+                    print("✅ Header authentication successful!")
+            else:
+                authenticator = None
+        
+        discovery = APIDiscovery(args.url, timeout=args.timeout, authenticator=authenticator,
+                                 verbose=args.verbose, session=session)
         
-        discovery = APIDiscovery(args.url, timeout=args.timeout, authenticator=authenticator, verbose=args.verbose)
+        # The extra path scans don't depend on the page crawl or on each other,
+        # so each runs on its own worker thread while discover_endpoints()
+        # fetches and parses the page
+        scanner = EndpointScanner(session=discovery.session)
         
-        # Main discovery
         if args.verbose:
             print("🕷️  Scanning web page...")
-        endpoints = discovery.discover_endpoints()
-        
-        # Additional scanning methods
-        scanner = EndpointScanner()
-        
-        if args.scan_common_paths:
-            if args.verbose:
+            if args.scan_common_paths:
                 print("🔎 Scanning common API paths...")
-            common_endpoints = scanner.scan_common_paths(args.url, discovery.session)
-            endpoints.extend(common_endpoints)
-        
-        if args.include_swagger:
-            if args.verbose:
+            if args.include_swagger:
                 print("📚 Looking for Swagger documentation...")
-            swagger_endpoints = scanner.discover_swagger_docs(args.url, discovery.session)
-            endpoints.extend(swagger_endpoints)
-        
-        # Additional scans
-        if args.verbose:
             print("🤖 Checking robots.txt...")
-        robots_endpoints = scanner.scan_robots_txt(args.url, discovery.session)
-        endpoints.extend(robots_endpoints)
-        
-        if args.verbose:
             print("🗺️  Checking sitemap...")
-        sitemap_endpoints = scanner.scan_sitemap(args.url, discovery.session)
-        endpoints.extend(sitemap_endpoints)
         
-        # Remove duplicates and filter by confidence
-        unique_endpoints = discovery._deduplicate_endpoints(endpoints)
-        filtered_endpoints = [
-            ep for ep in unique_endpoints 
-            if ep.confidence >= args.confidence_threshold
-        ]
+        # (url, method) pairs already collected; the first source to report one wins
+        seen = set()
+        unique_endpoints = []
+        jobs = scanner_jobs(scanner, args)
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            scan_futures = [executor.submit(job, args.url) for job in jobs]
+            _absorb(seen, unique_endpoints, discovery.discover_endpoints())
+            # Collect in submission order so the report order stays stable
+            for future in scan_futures:
+                _absorb(seen, unique_endpoints, future.result())
+        
+        # Filter by confidence; confidences are never negative, so the
+        # default threshold of 0.0 keeps everything without a pass
+        if args.confidence_threshold > 0.0:
+            filtered_endpoints = [
+                ep for ep in unique_endpoints 
+                if ep.confidence >= args.confidence_threshold
+            ]
+        else:
+            filtered_endpoints = unique_endpoints
         
         if args.verbose:
             print(f"✅ Discovery complete! Found {len(filtered_endpoints)} endpoints")
@@ -273,22 +404,17 @@ Examples:
         output_file = args.output
         
         # Extract domain for filename generation
-        from datetime import datetime
-        from urllib.parse import urlparse
         parsed_url = urlparse(args.url)
-        domain = parsed_url.netloc.replace(':', '_').replace('.', '_')
+        domain = parsed_url.netloc.translate(_NETLOC_SAFE)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Create extracts folder if it doesn't exist
-        import os
         extracts_dir = "extracts"
-        if not os.path.exists(extracts_dir):
-            os.makedirs(extracts_dir)
+        os.makedirs(extracts_dir, exist_ok=True)
         
         # If user provided output file, enhance it with domain if not already included
         if output_file and domain not in output_file:
             # Split filename and extension
-            from pathlib import Path
             path = Path(output_file)
             stem = path.stem
             suffix = path.suffix
@@ -298,19 +424,8 @@ Examples:
         
         # Auto-save functionality
         if args.auto_save and not args.output:
-            
-            if args.format == 'json':
-                output_file = os.path.join(extracts_dir, f"api_endpoints_{domain}_{timestamp}.json")
-            elif args.format == 'csv':
-                output_file = os.path.join(extracts_dir, f"api_endpoints_{domain}_{timestamp}.csv")
-            elif args.format == 'html':
-                output_file = os.path.join(extracts_dir, f"api_endpoints_{domain}_{timestamp}.html")
-            elif args.format == 'list':
-                output_file = os.path.join(extracts_dir, f"api_endpoints_{domain}_{timestamp}.txt")
-            elif args.format == 'detailed':
-                output_file = os.path.join(extracts_dir, f"api_detailed_{domain}_{timestamp}.txt")
-            else:
-                output_file = os.path.join(extracts_dir, f"api_endpoints_{domain}_{timestamp}.txt")
+            prefix, ext = _AUTOSAVE_SPEC.get(args.format, _AUTOSAVE_DEFAULT)
+            output_file = os.path.join(extracts_dir, f"{prefix}_{domain}_{timestamp}{ext}")
         
         # Generate report
         reporter = Reporter()
@@ -321,45 +436,47 @@ Examples:
                 with open(output_file, 'w', encoding='utf-8') as f:
                     f.write(output)
                 print(f"Report saved to: {output_file}")
-                print(output)  # Also display on console
+                if args.also_print:
+                    print(output)
             else:
                 print(output)
                 
         elif args.format == 'json':
-            output = reporter.generate_json_report(filtered_endpoints, output_file)
+            output = reporter.generate_json_report(filtered_endpoints, output_file, return_content=not output_file)
             if output_file:
                 print(f"JSON report saved to: {output_file}")
             else:
                 print(output)
                 
         elif args.format == 'csv':
-            output = reporter.generate_csv_report(filtered_endpoints, output_file)
+            output = reporter.generate_csv_report(filtered_endpoints, output_file, return_content=not output_file)
             if output_file:
                 print(f"CSV report saved to: {output_file}")
             else:
                 print(output)
                 
         elif args.format == 'html':
-            output = reporter.generate_html_report(filtered_endpoints, args.url, output_file)
             if output_file:
+                reporter.generate_html_report(filtered_endpoints, args.url, output_file, return_content=False)
                 print(f"HTML report saved to: {output_file}")
             else:
-                # For HTML without output file, create a temporary file
+                # For HTML without output file, stream into a temporary file
                 import tempfile
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False) as f:
-                    f.write(output)
+                with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as f:
                     temp_path = f.name
+                reporter.generate_html_report(filtered_endpoints, args.url, temp_path, return_content=False)
                 print(f"HTML report created: {temp_path}")
                 
         elif args.format == 'list':
-            output = reporter.generate_simple_list(filtered_endpoints, output_file)
+            output = reporter.generate_simple_list(filtered_endpoints, output_file, return_content=not output_file)
             if output_file:
                 print(f"Endpoint list saved to: {output_file}")
             else:
                 print(output)
                 
         elif args.format == 'detailed':
-            output = reporter.generate_detailed_list(filtered_endpoints, args.url, output_file)
+            output = reporter.generate_detailed_list(filtered_endpoints, args.url, output_file,
+                                                     return_content=not output_file)
             if output_file:
                 print(f"Detailed endpoint report saved to: {output_file}")
             else:
@@ -368,7 +485,7 @@ Examples:
         return 0
         
     except KeyboardInterrupt:
-        print("\\n❌ Scan interrupted by user", file=sys.stderr)
+        print("\n❌ Scan interrupted by user", file=sys.stderr)
         return 1
     except Exception as e:
         print(f"❌ Error during scan: {e}", file=sys.stderr)
@@ -0,0 +1,160 @@
+"""CachedSession revalidation and AuthCache storage."""
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from api_hunter import AuthCache, CachedSession
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """ETag-aware target; /target answers 304 to any validator, like a sloppy CDN."""
+
+    moved = False
+    full_responses = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b'', headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/etag':
+            if self.headers.get('If-None-Match') == '"v1"':
+                return self._reply(304)
+            type(self).full_responses += 1
+            return self._reply(200, b'fresh', [('ETag', '"v1"')])
+        if path == '/session':
+            return self._reply(200, b'hello', [('ETag', '"s1"'), ('Set-Cookie', 'sid=secret')])
+        if path == '/plain':
+            return self._reply(200, b'plain')
+        if path == '/moving':
+            if type(self).moved:
+                return self._reply(302, headers=[('Location', '/target')])
+            return self._reply(200, b'old', [('ETag', '"m1"')])
+        if path == '/target':
+            if self.headers.get('If-None-Match'):
+                return self._reply(304)
+            return self._reply(200, b'target')
+        self._reply(404)
+
+
+class CachedSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        _Handler.moved = False
+        _Handler.full_responses = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:%d' % self.server.server_port
+        self.cache_dir = tempfile.mkdtemp()
+        self.session = CachedSession(self.cache_dir)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def _metadata_files(self):
+        return [name for name in os.listdir(self.cache_dir) if name.endswith('.json')]
+
+    def test_not_modified_replays_cached_body(self):
+        first = self.session.get(self.base_url + '/etag')
+        second = self.session.get(self.base_url + '/etag')
+        self.assertEqual((first.status_code, first.content), (200, b'fresh'))
+        self.assertEqual((second.status_code, second.content), (200, b'fresh'))
+        self.assertEqual(_Handler.full_responses, 1)
+
+    def test_response_without_validators_is_not_stored(self):
+        response = self.session.get(self.base_url + '/plain')
+        self.assertEqual(response.content, b'plain')
+        self.assertEqual(self._metadata_files(), [])
+
+    def test_credential_headers_are_not_written(self):
+        self.session.get(self.base_url + '/session')
+        [name] = self._metadata_files()
+        with open(os.path.join(self.cache_dir, name), encoding='utf-8') as f:
+            headers = {key.lower() for key in json.load(f)['headers']}
+        self.assertNotIn('set-cookie', headers)
+        self.assertIn('etag', headers)
+
+    def test_validators_do_not_follow_redirects(self):
+        self.session.get(self.base_url + '/moving')
+        _Handler.moved = True
+        response = self.session.get(self.base_url + '/moving')
+        self.assertEqual((response.status_code, response.content), (200, b'target'))
+
+    def test_missing_body_refetches_without_validators(self):
+        self.session.get(self.base_url + '/etag')
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.body'):
+                os.unlink(os.path.join(self.cache_dir, name))
+        response = self.session.get(self.base_url + '/etag')
+        self.assertEqual((response.status_code, response.content), (200, b'fresh'))
+        self.assertEqual(_Handler.full_responses, 2)
+
+    def test_oldest_entries_are_evicted(self):
+        session = CachedSession(self.cache_dir, max_entries=2)
+        for n in range(4):
+            session.get(self.base_url + '/etag?n=%d' % n)
+        session.close()
+        self.assertLessEqual(len(self._metadata_files()), 2)
+
+
+class AuthCacheTest(unittest.TestCase):
+
+    origin = 'http://127.0.0.1:8000'
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _save(self, cache, endpoint=None):
+        session = requests.Session()
+        session.cookies.set('sid', 'ok')
+        cache.save('spond', 'user', self.origin, session.cookies, {'Authorization': 'Bearer t'}, endpoint)
+
+    def test_entry_is_owner_only(self):
+        cache = AuthCache(self.cache_dir)
+        self._save(cache)
+        [name] = os.listdir(cache.auth_dir)
+        self.assertEqual(stat.S_IMODE(os.stat(cache.auth_dir / name).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(cache.auth_dir).st_mode), 0o700)
+
+    def test_restored_cookies_are_pinned_to_the_origin(self):
+        cache = AuthCache(self.cache_dir)
+        self._save(cache)
+        entry = cache.load('spond', 'user', self.origin)
+        self.assertEqual(entry['headers'], {'Authorization': 'Bearer t'})
+        self.assertEqual([cookie.domain for cookie in entry['cookies']], ['127.0.0.1'])
+
+    def test_expired_entry_is_ignored(self):
+        self._save(AuthCache(self.cache_dir))
+        self.assertIsNone(AuthCache(self.cache_dir, ttl=-1).load('spond', 'user', self.origin))
+
+    def test_login_endpoint_is_part_of_the_key(self):
+        cache = AuthCache(self.cache_dir)
+        self._save(cache, endpoint='/api/login')
+        self.assertIsNone(cache.load('spond', 'user', self.origin))
+        self.assertIsNotNone(cache.load('spond', 'user', self.origin, '/api/login'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""The session shared by login, discovery and scanning keeps one adapter."""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from api_hunter import APIDiscovery, Authenticator, EndpointScanner
+from api_hunter.auth import mount_pooled_adapter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Tiny target: POST /api/login hands out a token, /api answers JSON."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b'', content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        if self.path == '/':
+            self._reply(200, b'<a href="/api/v1/users">users</a>', 'text/html')
+        elif self.path.startswith('/api'):
+            self._reply(200, b'{}')
+        else:
+            self._reply(404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/api/login':
+            self._reply(200, json.dumps({'token': 't'}).encode('utf-8'))
+        else:
+            self._reply(404)
+
+
+class SessionReuseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:%d/' % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_adapter_survives_login_discovery_and_scanning(self):
+        session = requests.Session()
+        mount_pooled_adapter(session)
+
+        authenticator = Authenticator(session)
+        self.assertTrue(authenticator.login_spond('user', 'pw', self.base_url))
+        adapter_after_login = session.get_adapter(self.base_url)
+
+        discovery = APIDiscovery(self.base_url, timeout=5, authenticator=authenticator, session=session)
+        discovery.discover_endpoints()
+        self.assertIs(session.get_adapter(self.base_url), adapter_after_login)
+
+        scanner = EndpointScanner(session=discovery.session)
+        scanner.scan_common_paths(self.base_url)
+        self.assertIs(session.get_adapter(self.base_url), adapter_after_login)
+
+    def test_custom_adapter_is_not_replaced(self):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(max_retries=3)
+        session.mount('http://', adapter)
+
+        APIDiscovery(self.base_url, session=session)
+        EndpointScanner(session=session)
+        self.assertIs(session.get_adapter(self.base_url), adapter)
+
+
+if __name__ == '__main__':
+    unittest.main()
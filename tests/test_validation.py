@@ -0,0 +1,129 @@
+"""Endpoint validation: cache keys, per-host rate limiting and result order."""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from api_hunter import APIDiscovery
+from api_hunter.core import APIEndpoint
+
+
+class _Response:
+
+    def __init__(self, status_code, content_type='application/json', content=b'{}'):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict({'content-type': content_type})
+        self.content = content
+        self.text = content.decode('utf-8')
+
+
+class _StubSession:
+    """Answers from a url -> (delay, status) table and records every request."""
+
+    def __init__(self, routes=None, default_status=200):
+        self.headers = CaseInsensitiveDict()
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self.routes = routes or {}
+        self.default_status = default_status
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def _answer(self, url):
+        with self._lock:
+            self.requested.append(url)
+        delay, status = self.routes.get(url, (0, self.default_status))
+        time.sleep(delay)
+        if status is None:
+            raise requests.ConnectionError(url)
+        return _Response(status)
+
+    def head(self, url, **kwargs):
+        return self._answer(url)
+
+    def get(self, url, **kwargs):
+        return self._answer(url)
+
+
+class ValidationCacheTest(unittest.TestCase):
+
+    url = 'http://api.test/api/users'
+
+    def setUp(self):
+        self.session = _StubSession()
+        self.discovery = APIDiscovery('http://api.test/', session=self.session)
+
+    def _validate(self):
+        self.discovery._validate_endpoint(APIEndpoint(url=self.url, confidence=0.5))
+
+    def test_same_credentials_reuse_the_probe(self):
+        self._validate()
+        self._validate()
+        self.assertEqual(self.session.requested, [self.url])
+
+    def test_new_credentials_probe_again(self):
+        self._validate()
+        self.session.headers['Authorization'] = 'Bearer t'
+        self._validate()
+        self.session.cookies.set('sid', 'abc')
+        self._validate()
+        self._validate()
+        self.assertEqual(self.session.requested, [self.url] * 3)
+
+    def test_transport_errors_are_not_cached(self):
+        self.session.routes[self.url] = (0, None)
+        self._validate()
+        self._validate()
+        self.assertEqual(self.session.requested, [self.url] * 2)
+
+
+class HostRateLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.discovery = APIDiscovery('http://api.test/', max_workers=2, session=_StubSession())
+
+    def test_requests_past_the_burst_are_spaced(self):
+        with mock.patch('api_hunter.core.time.sleep') as sleep:
+            for _ in range(5):
+                self.discovery._wait_for_host('http://api.test/a')
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(len(delays), 3)
+        for delay, expected in zip(delays, (0.1, 0.2, 0.3)):
+            self.assertAlmostEqual(delay, expected, delta=0.02)
+
+    def test_hosts_do_not_share_a_bucket(self):
+        with mock.patch('api_hunter.core.time.sleep') as sleep:
+            for host in ('a.test', 'b.test', 'c.test'):
+                self.discovery._wait_for_host('http://%s/' % host)
+                self.discovery._wait_for_host('http://%s/' % host)
+        sleep.assert_not_called()
+
+
+class ResultOrderTest(unittest.TestCase):
+    """Later URLs answer first, so completion order is the reverse of input order."""
+
+    def test_validated_endpoints_keep_discovery_order(self):
+        urls = ['http://api.test/api/%d' % n for n in range(8)]
+        routes = {url: (0.01 * (len(urls) - n), 200 if n % 2 else 404) for n, url in enumerate(urls)}
+        discovery = APIDiscovery('http://api.test/', max_workers=8, session=_StubSession(routes))
+
+        endpoints = discovery._validate_endpoints([APIEndpoint(url=url, confidence=0.5) for url in urls])
+        self.assertEqual([endpoint.url for endpoint in endpoints], urls)
+        self.assertEqual([round(endpoint.confidence, 2) for endpoint in endpoints], [0.5, 0.8] * 4)
+
+    def test_authenticated_endpoints_are_reported_in_path_order(self):
+        paths = ['/client/api/user', '/client/api/sponds', '/api/user', '/api/settings']
+        urls = ['http://api.test' + path for path in paths]
+        routes = {url: (0.01 * (len(urls) - n), 200) for n, url in enumerate(urls)}
+        session = _StubSession(routes, default_status=404)
+        discovery = APIDiscovery('http://api.test/', session=session)
+
+        found = discovery._test_authenticated_endpoints('http://api.test/', set())
+        self.assertEqual([endpoint.url for endpoint in found], urls)
+
+
+if __name__ == '__main__':
+    unittest.main()